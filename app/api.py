@@ -0,0 +1,161 @@
+"""api.py"""
+
+import base64
+import hashlib
+import json
+from django.contrib.auth.decorators import login_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags, quote_etag, urlencode
+from django.views.decorators.http import require_GET
+from .models import EmployeeResource, Project, ProjectBudget, ProjectComment
+from .utils import month_input_key
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# Public field name -> ORM lookup, per resource. ``project`` and ``period``
+# name the lookups used by the ?project= and ?period= filters.
+RESOURCES = {
+    'projects': {
+        'queryset': Project.objects.all,
+        'fields': {
+            'id': 'id',
+            'name': 'name',
+        },
+        'project': 'id',
+        'period': 'budgets__period',
+    },
+    'budgets': {
+        'queryset': ProjectBudget.objects.all,
+        'fields': {
+            'id': 'id',
+            'project': 'project_id',
+            'month': 'month',
+            'year': 'year',
+            'period': 'period',
+            'budgeted_resources': 'budgeted_resources',
+            'actual_resources': 'actual_resources',
+            'intern_count': 'intern_count',
+        },
+        'project': 'project_id',
+        'period': 'period',
+    },
+    'allocations': {
+        'queryset': EmployeeResource.objects.all,
+        'fields': {
+            'id': 'id',
+            'project': 'project_budget__project_id',
+            'project_budget': 'project_budget_id',
+            'period': 'project_budget__period',
+            'employee': 'employee_id',
+            'employee_username': 'employee__username',
+            'allocation_ratio': 'allocation_ratio',
+            'is_intern': 'is_intern',
+        },
+        'project': 'project_budget__project_id',
+        'period': 'project_budget__period',
+    },
+    'comments': {
+        'queryset': ProjectComment.objects.all,
+        'fields': {
+            'id': 'id',
+            'project': 'project_budget__project_id',
+            'project_budget': 'project_budget_id',
+            'period': 'project_budget__period',
+            'user': 'user_id',
+            'username': 'user__username',
+            'text': 'text',
+            'created_at': 'created_at',
+        },
+        'project': 'project_budget__project_id',
+        'period': 'project_budget__period',
+    },
+}
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+def _error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+@require_GET
+@login_required
+def api_list(request, resource):
+    """List a resource with filtering, field selection and keyset pagination.
+
+    Query parameters:
+        fields: comma separated subset of the resource's fields.
+        project: project id.
+        period, period_from, period_to: months in 'YYYY-MM' form.
+        cursor: opaque cursor from ``next_cursor`` of the previous page.
+        limit: page size, at most MAX_LIMIT.
+
+    Responses carry an ETag; a matching If-None-Match returns 304.
+    """
+    spec = RESOURCES[resource]
+
+    if request.GET.get('fields'):
+        fields = request.GET['fields'].split(',')
+        unknown = [field for field in fields if field not in spec['fields']]
+        if unknown:
+            return _error(f"Unknown fields: {', '.join(unknown)}")
+        # The cursor is taken from the first column.
+        fields = ['id'] + [field for field in fields if field != 'id']
+    else:
+        fields = list(spec['fields'])
+
+    queryset = spec['queryset']()
+
+    try:
+        if request.GET.get('project'):
+            queryset = queryset.filter(**{spec['project']: int(request.GET['project'])})
+        if request.GET.get('period'):
+            queryset = queryset.filter(**{spec['period']: month_input_key(request.GET['period'])})
+        if request.GET.get('period_from'):
+            queryset = queryset.filter(**{f"{spec['period']}__gte": month_input_key(request.GET['period_from'])})
+        if request.GET.get('period_to'):
+            queryset = queryset.filter(**{f"{spec['period']}__lte": month_input_key(request.GET['period_to'])})
+        if request.GET.get('cursor'):
+            queryset = queryset.filter(id__gt=decode_cursor(request.GET['cursor']))
+        limit = min(int(request.GET.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+    except ValueError as e:
+        return _error(str(e))
+
+    if limit < 1:
+        return _error("limit must be positive.")
+
+    if resource == 'projects' and (request.GET.get('period') or request.GET.get('period_from') or request.GET.get('period_to')):
+        queryset = queryset.distinct()
+
+    # Fetch one extra row to know whether another page follows.
+    rows = list(queryset.order_by('id').values_list(*(spec['fields'][field] for field in fields))[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = encode_cursor(rows[-1][0]) if has_more else None
+    next_url = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_url = f"{request.path}?{urlencode(params, doseq=True)}"
+
+    body = json.dumps({
+        'results': [dict(zip(fields, row)) for row in rows],
+        'next_cursor': next_cursor,
+        'next': next_url,
+    }, cls=DjangoJSONEncoder).encode()
+
+    etag = quote_etag(hashlib.md5(body).hexdigest())
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    return response
@@ -6,3 +6,7 @@ class AppConfig(AppConfig):
     """Appconfig Class"""
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
+
+    def ready(self):
+        """Register signal handlers."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,176 @@
+"""async_views.py"""
+
+# Async variants of the read-heavy views, routed in place of the ones in
+# views.py when settings.ASYNC_VIEWS is on (the ASGI deployment path). They
+# use the async ORM and run independent queries concurrently.
+
+import asyncio
+import calendar
+from datetime import datetime
+from decimal import Decimal
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.db.models import Min, Sum
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect, render
+from django.utils.http import urlencode
+from .cache import dashboard_projects
+from .models import EmployeeCapacity, EmployeeResource, Project, ProjectBudget, ProjectComment
+from .permissions import dashboard_for
+from .reports import allocation_overview, comments_page
+from .utils import parse_allocation_ratio, parse_period, period_key, period_label
+from .views import DASHBOARD_TEMPLATES, _filtered_allocations
+
+# Templates may still touch lazy relations, so they render in a worker thread.
+_render = sync_to_async(render)
+
+async def _aget_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+async def _dashboard(request, name):
+    projects_html = await sync_to_async(dashboard_projects)(name)
+    return await _render(request, DASHBOARD_TEMPLATES[name], {'projects_html': projects_html})
+
+@login_required
+async def dashboard(request):
+    """Render the dashboard based on the user's capabilities."""
+    return await _dashboard(request, dashboard_for(request))
+
+@login_required
+async def team_lead_dashboard(request):
+    """View to render the dashboard for Team Leads."""
+    if dashboard_for(request) != 'Team Lead':
+        return redirect('dashboard')
+    return await _dashboard(request, 'Team Lead')
+
+@login_required
+async def employee_dashboard(request):
+    """View to render the dashboard for Employees."""
+    if dashboard_for(request) != 'Employee':
+        return redirect('dashboard')
+    return await _dashboard(request, 'Employee')
+
+@login_required
+async def project_details(request, project_id):
+    """View to display the details of a specific project and allow filtering by period.
+
+    The resources and the first page of comments are loaded concurrently once
+    the budget is known.
+    """
+    project = await _aget_or_404(Project.objects.annotate(start_period=Min('budgets__period')), pk=project_id)
+
+    available_periods = [period_label(project.start_period + i) for i in range(6)] if project.start_period else []
+
+    selected_period = request.GET.get('period', available_periods[0] if available_periods else None)
+
+    try:
+        budget_period = parse_period(selected_period)
+    except (ValueError, AttributeError):
+        budget_period = None
+
+    budget = await ProjectBudget.objects.filter(project=project, period=budget_period).order_by('pk').afirst() if budget_period else None
+
+    if request.method == 'POST' and 'comment_text' in request.POST:
+        comment_text = request.POST['comment_text']
+        if comment_text and budget:
+            await ProjectComment.objects.acreate(
+                project_budget=budget,
+                user=await request.auser(),
+                text=comment_text
+            )
+            return redirect('project_details', project_id=project.id)
+
+    recent_comments, next_cursor, employee_resources = None, None, []
+    if budget:
+        (recent_comments, next_cursor), employee_resources = await asyncio.gather(
+            sync_to_async(comments_page)(budget.id),
+            _alist(EmployeeResource.objects.filter(project_budget=budget).select_related('employee')),
+        )
+
+    return await _render(request, 'project_details.html', {
+        'project': project,
+        'budget': budget,
+        'available_periods': available_periods,
+        'selected_period': selected_period,
+        'recent_comments': recent_comments,
+        'next_cursor': next_cursor,
+        'employee_resources': employee_resources,
+        'actual_resources': (budget.actual_resources if budget else None) or Decimal('0'),
+        'profit_rating': budget.profit_rating if budget else None,
+        'profit_loss_percentage': budget.profit_loss_percentage if budget else None,
+    })
+
+@login_required
+async def resource_allocation_overview(request):
+    """View to display an overview of resource allocations for team leads and employees."""
+    year = request.GET.get('year', None)
+    month = request.GET.get('month', None)
+    project_id = request.GET.get('project', None)
+
+    (page, resource_allocations), available_projects = await asyncio.gather(
+        sync_to_async(allocation_overview)(_filtered_allocations(request), request.GET.get('page')),
+        _alist(Project.objects.all()),
+    )
+    filter_query = urlencode({key: value for key, value in request.GET.items() if key != 'page' and value})
+
+    current_year = datetime.now().year
+    return await _render(request, 'resource_allocation_overview.html', {
+        'resource_allocations': resource_allocations,
+        'page': page,
+        'filter_query': filter_query,
+        'available_months': list(calendar.month_abbr)[1:],
+        'available_years': [str(year) for year in range(current_year, current_year + 5)],
+        'available_projects': available_projects,
+        'selected_month': month,
+        'selected_year': year,
+        'selected_project': project_id,
+    })
+
+@login_required
+async def month_resource_allocation_overview(request):
+    """View to display the sum of budgeted and actual resources for all projects in a specific month and year."""
+    year = request.GET.get('year', None)
+    month = request.GET.get('month', None)
+
+    month_resource_summary = None
+    if year and month:
+        try:
+            project_budgets = ProjectBudget.objects.filter(period=period_key(month, year))
+        except ValueError:
+            project_budgets = ProjectBudget.objects.none()
+
+        budgeted, actual = await asyncio.gather(
+            project_budgets.aaggregate(total=Sum('budgeted_resources')),
+            EmployeeResource.objects.filter(project_budget__in=project_budgets).aaggregate(total=Sum('allocation_ratio')),
+        )
+        month_resource_summary = {
+            'budgeted_resources_sum': budgeted['total'] or Decimal('0.0'),
+            'actual_resources_sum': actual['total'] or Decimal('0.0'),
+        }
+
+    current_year = datetime.now().year
+    return await _render(request, 'month_resource_allocation_overview.html', {
+        'available_months': list(calendar.month_abbr)[1:],
+        'available_years': [str(year) for year in range(current_year, current_year + 5)],
+        'selected_month': month,
+        'selected_year': year,
+        'month_resource_summary': month_resource_summary,
+    })
+
+@login_required
+async def check_allocation_conflict(request, employee_id):
+    """Check if adding the specified allocation ratio would exceed 1 for the given employee or team lead."""
+    try:
+        allocation_ratio, _ = parse_allocation_ratio(request.GET.get('allocation_ratio', 0))
+        budget_period = period_key(request.GET.get('month'), request.GET.get('year'))
+    except ValueError:
+        return JsonResponse({'conflict': True, 'error': 'Invalid data provided.'})
+
+    total_allocation = await EmployeeCapacity.aallocated_for(employee_id, budget_period)
+    return JsonResponse({'conflict': total_allocation + allocation_ratio > 1})
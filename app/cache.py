@@ -0,0 +1,82 @@
+"""cache.py"""
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from .models import Project
+from .reports import portfolio_summary, utilization_matrix
+
+DASHBOARD_ROLES = ('Manager', 'Team Lead', 'Employee')
+
+def _dashboard_key(role):
+    return f"dashboard:projects:{role.lower().replace(' ', '-')}"
+
+def _record(name, hit):
+    """Count a cache hit or miss; counters live in the cache so all workers share them."""
+    key = f"stats:{name}:{'hits' if hit else 'misses'}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+def cache_stats():
+    """Return the hit and miss counters of the cached fragments."""
+    stats = {}
+    for name in ('dashboard', 'portfolio', 'utilization'):
+        hits = cache.get(f"stats:{name}:hits", 0)
+        misses = cache.get(f"stats:{name}:misses", 0)
+        stats[name] = {'hits': hits, 'misses': misses}
+    return stats
+
+def dashboard_projects(role):
+    """Rendered project list for a role's dashboard, cached until a project or budget changes."""
+    key = _dashboard_key(role)
+    html = cache.get(key)
+    _record('dashboard', html is not None)
+    if html is None:
+        html = render_to_string('dashboard_projects.html', {'projects': Project.objects.all()})
+        cache.set(key, str(html), None)
+    return mark_safe(html)
+
+def invalidate_dashboards():
+    """Drop the cached dashboard project lists of every role."""
+    cache.delete_many([_dashboard_key(role) for role in DASHBOARD_ROLES])
+
+def _portfolio_version():
+    return cache.get_or_set('portfolio:version', 1, None)
+
+def cached_portfolio_summary(start_period, end_period):
+    """Portfolio P&L for a period range, cached until any budget or allocation changes."""
+    key = f"portfolio:{_portfolio_version()}:{start_period}:{end_period}"
+    projects = cache.get(key)
+    _record('portfolio', projects is not None)
+    if projects is None:
+        projects = portfolio_summary(start_period, end_period)
+        cache.set(key, projects, 60 * 60)
+    return projects
+
+def cached_utilization_matrix(start_period, end_period, project_id=None):
+    """Utilization heatmap for a period range and project filter, cached until any budget or allocation changes."""
+    key = f"utilization:{_portfolio_version()}:{start_period}:{end_period}:{project_id or 'all'}"
+    matrix = cache.get(key)
+    _record('utilization', matrix is not None)
+    if matrix is None:
+        matrix = utilization_matrix(start_period, end_period, project_id)
+        cache.set(key, matrix, 60 * 60)
+    return matrix
+
+def invalidate_portfolio():
+    """Retire every cached portfolio range and utilization heatmap by bumping the cache version."""
+    cache.add('portfolio:version', 1, None)
+    try:
+        cache.incr('portfolio:version')
+    except ValueError:
+        cache.set('portfolio:version', 2, None)
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+def invalidate_user(user_id):
+    """Drop the cached copy of a user loaded by app.middleware.CachedAuthenticationMiddleware."""
+    cache.delete(user_cache_key(user_id))
@@ -0,0 +1,5 @@
+"""context_processors.py"""
+
+def capabilities(request):
+    """Expose the user's capabilities to templates as ``can.<capability>`` flags."""
+    return {'can': {capability: True for capability in getattr(request, 'capabilities', ())}}
@@ -1,16 +1,25 @@
 """Decorators.py"""
 
 from functools import wraps
-from django.shortcuts import redirect
+from asgiref.sync import iscoroutinefunction
 
-def role_required(allowed_roles=[]):
-    """role required func"""
-    def decorator(view_func):
-        """decorator func"""
+def requires(capability, view_func, json=False, owner=None):
+    """Mark a view as needing a capability; PermissionMiddleware enforces it.
+
+    ``owner`` is an optional ``owner(request, **view_kwargs)`` check that lets
+    the user through without the capability when they own the object the
+    view acts on. Denied page requests are redirected to the dashboard with
+    an error message; with ``json`` set they get a 403 JSON response instead.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            return await view_func(request, *args, **kwargs)
+    else:
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-            if request.user.is_authenticated and request.user.role in allowed_roles:
-                return view_func(request, *args, **kwargs)
-            return redirect('login')
-        return wrapper
-    return decorator
+            return view_func(request, *args, **kwargs)
+    wrapper.required_capability = capability
+    wrapper.json_denial = json
+    wrapper.owner_check = owner
+    return wrapper
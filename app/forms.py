@@ -2,10 +2,12 @@
 
 import calendar
 from datetime import datetime
+from decimal import Decimal
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.core.exceptions import ValidationError
 from .models import User, Project, ProjectBudget, EmployeeResource
+from .utils import parse_allocation_ratio, period_label
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -97,6 +99,50 @@ class EmployeeForm(forms.ModelForm):
             raise ValidationError("An employee with this email already exists.")
         return email
 
+class BudgetPlanForm(forms.Form):
+    """Form for the budgeted resources of several consecutive periods of a project."""
+    copy_forward = forms.BooleanField(
+        required=False,
+        label="Copy values forward into empty months",
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+    def __init__(self, *args, periods=(), **kwargs):
+        super(BudgetPlanForm, self).__init__(*args, **kwargs)
+        self.periods = list(periods)
+        for period in self.periods:
+            self.fields[f'period_{period}'] = forms.DecimalField(
+                label=period_label(period),
+                required=False,
+                min_value=0,
+                max_value=10,
+                decimal_places=2,
+                widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'min': '0', 'max': '10.00'})
+            )
+
+    def period_fields(self):
+        """Bound fields of the periods, in order."""
+        return [self[f'period_{period}'] for period in self.periods]
+
+    def budgets_by_period(self):
+        """Cleaned budgeted resources keyed by period; empty months are None."""
+        return {period: self.cleaned_data.get(f'period_{period}') for period in self.periods}
+
+def validate_allocation_ratio(value):
+    """Validate an allocation ratio: a number between 0.10 and 1.00, or 'intern'.
+
+    Returns a ``(ratio, is_intern)`` tuple.
+    """
+    try:
+        allocation_ratio, is_intern = parse_allocation_ratio(value)
+    except ValueError:
+        raise forms.ValidationError("Please enter a valid number between 0.10 and 1.00, or the word 'intern'.")
+
+    if not is_intern and not (Decimal('0.10') <= allocation_ratio <= Decimal('1.00')):
+        raise forms.ValidationError("Allocation ratio must be between 0.10 and 1.00.")
+
+    return allocation_ratio, is_intern
+
 class EmployeeResourceForm(forms.ModelForm):
     """Form for Employee Resource"""
     class Meta:
@@ -110,17 +156,110 @@ class EmployeeResourceForm(forms.ModelForm):
     )
 
     def clean_allocation_ratio(self):
-        allocation_ratio = self.cleaned_data.get('allocation_ratio').strip().lower()
+        allocation_ratio, is_intern = validate_allocation_ratio(self.cleaned_data.get('allocation_ratio'))
+        self.instance.is_intern = is_intern
+        return allocation_ratio
+
+class AllocationGridForm(forms.Form):
+    """Form for every allocation of a project budget at once, plus rows for new employees.
+
+    Submitted new rows beyond ``extra`` (added in the browser) are picked up
+    from the data, up to MAX_NEW_ROWS.
+    """
+    MAX_NEW_ROWS = 50
+
+    def __init__(self, *args, resources=(), extra=3, **kwargs):
+        super(AllocationGridForm, self).__init__(*args, **kwargs)
+        self.resources = list(resources)
+        for resource in self.resources:
+            self.fields[f'ratio_{resource.pk}'] = forms.CharField(
+                required=False,
+                max_length=10,
+                initial=resource.allocation_display,
+                widget=forms.TextInput(attrs={'class': 'form-control', 'data-employee': resource.employee_id})
+            )
+            self.fields[f'delete_{resource.pk}'] = forms.BooleanField(
+                required=False,
+                widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+            )
 
-        if allocation_ratio == 'intern':
-            return allocation_ratio
+        self.too_many_rows = False
+        if self.is_bound:
+            submitted = [key[len('new_employee_'):] for key in self.data if key.startswith('new_employee_')]
+            extra = max([extra] + [int(index) + 1 for index in submitted if index.isdigit()])
+            self.too_many_rows = extra > self.MAX_NEW_ROWS
+        self.extra = min(extra, self.MAX_NEW_ROWS)
+        for index in range(self.extra):
+            self.fields[f'new_employee_{index}'] = forms.CharField(
+                required=False,
+                widget=forms.TextInput(attrs={
+                    'class': 'form-control',
+                    'list': 'employee_options',
+                    'placeholder': 'Start typing a name...',
+                    'autocomplete': 'off',
+                })
+            )
+            self.fields[f'new_ratio_{index}'] = forms.CharField(
+                required=False,
+                max_length=10,
+                widget=forms.TextInput(attrs={'class': 'form-control'})
+            )
 
-        try:
-            allocation_ratio = float(allocation_ratio)
-        except ValueError:
-            raise forms.ValidationError("Please enter a valid number between 0.10 and 1.00, or the word 'intern'.")
+    def resource_rows(self):
+        """``(resource, ratio, delete)`` bound fields of the current allocations, in order."""
+        return [(resource, self[f'ratio_{resource.pk}'], self[f'delete_{resource.pk}']) for resource in self.resources]
 
-        if not (0.10 <= allocation_ratio <= 1.00):
-            raise forms.ValidationError("Allocation ratio must be between 0.10 and 1.00.")
+    def new_rows(self):
+        """``(employee, ratio)`` bound fields of the new rows, in order."""
+        return [(self[f'new_employee_{index}'], self[f'new_ratio_{index}']) for index in range(self.extra)]
 
-        return round(allocation_ratio, 2)
+    def clean(self):
+        cleaned_data = super(AllocationGridForm, self).clean()
+        if self.too_many_rows:
+            raise ValidationError(f"At most {self.MAX_NEW_ROWS} new resources can be added at once.")
+        self.changes = {}
+        for resource in self.resources:
+            if cleaned_data.get(f'delete_{resource.pk}'):
+                self.changes[resource.pk] = None
+            elif f'ratio_{resource.pk}' in cleaned_data:
+                try:
+                    self.changes[resource.pk] = validate_allocation_ratio(cleaned_data[f'ratio_{resource.pk}'])
+                except ValidationError as e:
+                    self.add_error(f'ratio_{resource.pk}', e)
+
+        rows = {}
+        for index in range(self.extra):
+            username = cleaned_data.get(f'new_employee_{index}', '').strip()
+            ratio = cleaned_data.get(f'new_ratio_{index}', '').strip()
+            if not username and not ratio:
+                continue
+            if not username:
+                self.add_error(f'new_employee_{index}', "Pick an employee.")
+            elif any(row[0] == username for row in rows.values()):
+                self.add_error(f'new_employee_{index}', f"{username} is already in another row.")
+            else:
+                try:
+                    rows[index] = (username,) + validate_allocation_ratio(ratio)
+                except ValidationError as e:
+                    self.add_error(f'new_ratio_{index}', e)
+
+        employees = {}
+        if rows:
+            employees = {
+                employee.username: employee
+                for employee in User.objects.filter(username__in={row[0] for row in rows.values()}, is_active=True)
+            }
+        self.additions = []
+        for index, (username, allocation_ratio, is_intern) in rows.items():
+            if username in employees:
+                self.additions.append((employees[username], allocation_ratio, is_intern))
+            else:
+                self.add_error(f'new_employee_{index}', f"Unknown employee {username}.")
+        return cleaned_data
+
+class AllocationImportForm(forms.Form):
+    """Form for uploading a CSV of monthly allocations."""
+    file = forms.FileField(
+        help_text="CSV with the columns project, period, employee and allocation_ratio.",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv'})
+    )
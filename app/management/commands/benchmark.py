@@ -0,0 +1,131 @@
+"""benchmark.py"""
+
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.http import urlencode
+from app.middleware import QueryTimer
+from app.models import ProjectBudget
+from app.utils import period_label
+
+User = get_user_model()
+
+def benchmark_cases():
+    """``(name, role, url)`` of the benchmarked pages, against the first budget with allocations."""
+    budget = ProjectBudget.objects.filter(employee_resources__isnull=False).select_related('project').order_by('id').first()
+    if budget is None:
+        raise CommandError("No allocations to benchmark; run seed_data first.")
+    period = period_label(budget.period)
+    month, year = period.split()
+    project_url = reverse('project_details', kwargs={'project_id': budget.project_id})
+    manage_url = reverse('manage_resources', kwargs={'project_id': budget.project_id})
+    overview_url = reverse('resource_allocation_overview')
+    return [
+        ('manager_dashboard', 'Manager', reverse('dashboard')),
+        ('team_lead_dashboard', 'Team Lead', reverse('team_lead_dashboard')),
+        ('employee_dashboard', 'Employee', reverse('employee_dashboard')),
+        ('project_details', 'Manager', f"{project_url}?{urlencode({'period': period})}"),
+        ('resource_allocation_overview', 'Manager', overview_url),
+        ('resource_allocation_overview_month', 'Manager', f"{overview_url}?{urlencode({'month': month, 'year': year})}"),
+        (
+            'month_resource_allocation_overview',
+            'Manager',
+            f"{reverse('month_resource_allocation_overview')}?{urlencode({'month': month, 'year': year})}"
+        ),
+        ('manage_resources', 'Manager', f"{manage_url}?{urlencode({'period': period})}"),
+    ]
+
+def benchmark_user(role):
+    user = User.objects.filter(role=role, is_active=True).order_by('id').first()
+    if user is None:
+        raise CommandError(f"No active {role} to log in as; run seed_data first.")
+    return user
+
+class Command(BaseCommand):
+    """Benchmark the main pages with the test client."""
+    help = (
+        "Request the dashboards, project details, resource overviews and manage resources pages "
+        "and report p50/p95 latency and query counts as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20, help="Timed requests per page.")
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed requests per page, to fill caches.")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--compare', help="Earlier JSON report to print p95 and query deltas against.")
+
+    def _run(self, client, url, options):
+        for _ in range(options['warmup']):
+            client.get(url)
+
+        timings, queries, db_timings = [], [], []
+        for _ in range(options['requests']):
+            timer = QueryTimer()
+            start = time.perf_counter()
+            with connection.execute_wrapper(timer):
+                response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+            queries.append(timer.count)
+            db_timings.append(timer.duration * 1000)
+
+        return {
+            'url': url,
+            'status': response.status_code,
+            'requests': len(timings),
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(statistics.quantiles(timings, n=20, method='inclusive')[18], 2),
+            'max_ms': round(max(timings), 2),
+            'queries': max(queries),
+            'db_ms': round(statistics.median(db_timings), 2),
+        }
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError("--requests must be at least 2.")
+
+        clients = {}
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for name, role, url in benchmark_cases():
+                if role not in clients:
+                    clients[role] = Client()
+                    clients[role].force_login(benchmark_user(role))
+                results[name] = self._run(clients[role], url, options)
+                self.stderr.write(f"{name}: p50 {results[name]['p50_ms']} ms, p95 {results[name]['p95_ms']} ms, {results[name]['queries']} queries")
+
+        report = {
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'results': results,
+        }
+
+        if options['compare']:
+            try:
+                with open(options['compare']) as baseline_file:
+                    baseline = json.load(baseline_file)['results']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+            for name, result in results.items():
+                if name in baseline:
+                    self.stderr.write(
+                        f"{name}: p95 {result['p95_ms'] - baseline[name]['p95_ms']:+.2f} ms, "
+                        f"queries {result['queries'] - baseline[name]['queries']:+d}"
+                    )
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
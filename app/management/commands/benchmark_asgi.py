@@ -0,0 +1,152 @@
+"""benchmark_asgi.py"""
+
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from .benchmark import benchmark_cases, benchmark_user
+
+MODES = ('wsgi', 'asgi')
+
+def _summary(url, responses, elapsed):
+    timings = [timing for _, timing in responses]
+    return {
+        'url': url,
+        'status': max(status for status, _ in responses),
+        'requests': len(responses),
+        'requests_per_s': round(len(responses) / elapsed, 1),
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(statistics.quantiles(timings, n=20, method='inclusive')[18], 2),
+    }
+
+class Command(BaseCommand):
+    """Compare page throughput through the WSGI and ASGI handlers."""
+    help = (
+        "Request the benchmarked pages concurrently, through the WSGI handler on a thread pool and "
+        "through the ASGI handler with ASYNC_VIEWS on one event loop, and report requests/s and "
+        "p50/p95 latency per page as JSON. Each mode runs in its own process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help="Timed requests per page.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Requests in flight at a time.")
+        parser.add_argument('--mode', choices=MODES, help="Run a single mode in this process.")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+
+    def _batches(self, options):
+        """Split the requests over the concurrent workers."""
+        per_worker, extra = divmod(options['requests'], options['concurrency'])
+        return [per_worker + (index < extra) for index in range(options['concurrency'])]
+
+    def _wsgi(self, url, role, options):
+        user = benchmark_user(role)
+        clients = []
+        for _ in range(options['concurrency']):
+            clients.append(Client())
+            clients[-1].force_login(user)
+        clients[0].get(url)
+
+        def worker(client, count):
+            responses = []
+            for _ in range(count):
+                start = time.perf_counter()
+                status = client.get(url).status_code
+                responses.append((status, (time.perf_counter() - start) * 1000))
+            close_old_connections()
+            return responses
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            batches = pool.map(worker, clients, self._batches(options))
+            responses = [response for batch in batches for response in batch]
+        return _summary(url, responses, time.perf_counter() - start)
+
+    async def _asgi(self, url, user, options):
+        clients = []
+        for _ in range(options['concurrency']):
+            clients.append(AsyncClient())
+            await clients[-1].aforce_login(user)
+        await clients[0].get(url)
+
+        async def worker(client, count):
+            responses = []
+            for _ in range(count):
+                start = time.perf_counter()
+                status = (await client.get(url)).status_code
+                responses.append((status, (time.perf_counter() - start) * 1000))
+            return responses
+
+        start = time.perf_counter()
+        batches = await asyncio.gather(*map(worker, clients, self._batches(options)))
+        responses = [response for batch in batches for response in batch]
+        return _summary(url, responses, time.perf_counter() - start)
+
+    def _run_mode(self, options):
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for name, role, url in benchmark_cases():
+                if options['mode'] == 'wsgi':
+                    results[name] = self._wsgi(url, role, options)
+                else:
+                    results[name] = asyncio.run(self._asgi(url, benchmark_user(role), options))
+                self.stderr.write(
+                    f"{options['mode']} {name}: {results[name]['requests_per_s']} req/s, "
+                    f"p50 {results[name]['p50_ms']} ms, p95 {results[name]['p95_ms']} ms"
+                )
+        return {'async_views': settings.ASYNC_VIEWS, 'results': results}
+
+    def _spawn(self, mode, options):
+        """Run one mode in a child process, so the URLconf is built with its ASYNC_VIEWS."""
+        env = dict(os.environ, ASYNC_VIEWS='1' if mode == 'asgi' else '0')
+        command = [
+            sys.executable, sys.argv[0], 'benchmark_asgi',
+            '--mode', mode,
+            '--requests', str(options['requests']),
+            '--concurrency', str(options['concurrency']),
+        ]
+        child = subprocess.run(command, env=env, stdout=subprocess.PIPE, text=True)
+        if child.returncode:
+            raise CommandError(f"The {mode} benchmark failed.")
+        return json.loads(child.stdout)
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2 or options['concurrency'] < 1:
+            raise CommandError("--requests must be at least 2 and --concurrency at least 1.")
+        if options['concurrency'] > options['requests']:
+            raise CommandError("--concurrency cannot exceed --requests.")
+
+        if options['mode']:
+            report = self._run_mode(options)
+        else:
+            modes = {mode: self._spawn(mode, options) for mode in MODES}
+            report = {
+                'generated_at': datetime.now(timezone.utc).isoformat(),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'concurrency': options['concurrency'],
+                'modes': modes,
+                'speedup': {
+                    name: round(result['requests_per_s'] / modes['wsgi']['results'][name]['requests_per_s'], 2)
+                    for name, result in modes['asgi']['results'].items()
+                },
+            }
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,37 @@
+"""import_allocations.py"""
+
+import csv
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from app.services import import_allocations, read_allocation_csv
+
+class Command(BaseCommand):
+    """Import monthly allocations from a CSV file."""
+    help = "Import monthly allocations from a CSV with the columns project, period, employee and allocation_ratio."
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help="Path to the CSV file.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows validated and written per transaction.")
+        parser.add_argument('--errors', help="Write the per-row error report to this CSV file.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as csv_file:
+                report = import_allocations(read_allocation_csv(csv_file), batch_size=options['batch_size'])
+        except OSError as e:
+            raise CommandError(str(e))
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='') as errors_file:
+                writer = csv.DictWriter(errors_file, fieldnames=['line', 'error'])
+                writer.writeheader()
+                writer.writerows(report['errors'])
+        else:
+            for error in report['errors']:
+                self.stderr.write(f"Line {error['line']}: {error['error']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} allocations, {len(report['errors'])} rows rejected."
+        ))
@@ -0,0 +1,35 @@
+"""roll_forward_allocations.py"""
+
+from django.core.management.base import BaseCommand, CommandError
+from app.models import Project
+from app.services import roll_forward_allocations
+from app.utils import parse_period, period_label
+
+class Command(BaseCommand):
+    """Copy a month's allocations into the following month."""
+    help = "Copy the allocations of a period (e.g. 'Oct 2026') into the next month, for one project or all of them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('period', help="Source period, e.g. 'Oct 2026'.")
+        parser.add_argument('--project', help="Only roll forward this project, by name.")
+
+    def handle(self, *args, **options):
+        try:
+            source_period = parse_period(options['period'])
+        except ValueError:
+            raise CommandError(f"Invalid period {options['period']!r}; use 'Oct 2026'.")
+
+        project = None
+        if options['project']:
+            project = Project.objects.filter(name=options['project']).first()
+            if project is None:
+                raise CommandError(f"Unknown project {options['project']}.")
+
+        report = roll_forward_allocations(source_period, project)
+        for skipped in report['skipped']:
+            self.stderr.write(skipped)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled {report['created']} allocations forward to {period_label(source_period + 1)}, "
+            f"{report['existing']} already assigned, {len(report['skipped'])} skipped."
+        ))
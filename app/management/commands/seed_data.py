@@ -0,0 +1,140 @@
+"""seed_data.py"""
+
+import random
+from datetime import datetime
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from app.models import EmployeeCapacity, EmployeeResource, Project, ProjectBudget, ProjectComment
+from app.services import MAX_ALLOCATION, _after_bulk_allocation_write
+from app.utils import month_input_key, period_from_key
+
+User = get_user_model()
+
+ALLOCATION_RATIOS = [Decimal('0.10'), Decimal('0.20'), Decimal('0.25'), Decimal('0.50'), Decimal('0.75'), Decimal('1.00')]
+COMMENTS = [
+    "Staffing confirmed for the month.",
+    "Waiting on the client to sign off the scope.",
+    "One more developer needed from mid-month.",
+    "Budget looks tight, keep an eye on overtime.",
+    "Handover to the support team planned.",
+]
+BATCH_SIZE = 2000
+
+class Command(BaseCommand):
+    """Seed a synthetic dataset for load tests and benchmarks."""
+    help = "Seed users, projects, monthly budgets, allocations and comments at a configurable scale."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--projects', type=int, default=500)
+        parser.add_argument('--months', type=int, default=24)
+        parser.add_argument('--allocations', type=int, default=50000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--start', help="First month as YYYY-MM; defaults to the current month.")
+        parser.add_argument('--prefix', default='seed', help="Prefix of the generated usernames and project names.")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed, so runs are reproducible.")
+        parser.add_argument('--password', default='seed-password', help="Password of every generated user.")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Database alias to seed; defaults to the default database.")
+        parser.add_argument('--force', action='store_true', help="Seed even if the database already holds projects.")
+
+    def handle(self, *args, **options):
+        db = options['database']
+        prefix = options['prefix']
+        if not options['force'] and Project.objects.using(db).exists():
+            raise CommandError(
+                f"The {db!r} database already holds projects; seed a scratch database "
+                "(see --database and DB_NAME) or pass --force to add to it."
+            )
+        if User.objects.using(db).filter(username__startswith=f"{prefix}_").exists():
+            raise CommandError(f"Users prefixed {prefix}_ already exist; pick another --prefix.")
+        if options['users'] < 1 or options['projects'] < 1 or options['months'] < 1:
+            raise CommandError("--users, --projects and --months must be positive.")
+
+        if options['start']:
+            try:
+                start_period = month_input_key(options['start'])
+            except ValueError:
+                raise CommandError(f"Invalid --start {options['start']!r}; use YYYY-MM.")
+        else:
+            now = datetime.now()
+            start_period = now.year * 12 + now.month
+        periods = list(range(start_period, start_period + options['months']))
+
+        with transaction.atomic(using=db):
+            self._seed(db, prefix, periods, options)
+
+        # The ledger and the budget summaries were filled from the seeding tallies.
+        _after_bulk_allocation_write()
+        self.stdout.write(self.style.SUCCESS("Seeded the dataset."))
+
+    def _seed(self, db, prefix, periods, options):
+        rng = random.Random(options['seed'])
+        # Hashing is slow on purpose; every generated user shares one hash.
+        password = make_password(options['password'])
+
+        users = []
+        for index in range(options['users']):
+            role = rng.choices(['Manager', 'Team Lead', 'Employee'], weights=[2, 8, 90])[0]
+            users.append(User(username=f"{prefix}_user{index}", email=f"{prefix}_user{index}@example.com", role=role, password=password))
+        users = User.objects.using(db).bulk_create(users, batch_size=BATCH_SIZE)
+        self.stdout.write(f"Created {len(users)} users.")
+
+        projects = Project.objects.using(db).bulk_create(
+            [Project(name=f"{prefix} project {index}") for index in range(options['projects'])],
+            batch_size=BATCH_SIZE
+        )
+        budgets = []
+        for project in projects:
+            for period in periods:
+                month, year = period_from_key(period)
+                budgets.append(ProjectBudget(
+                    project=project,
+                    month=month,
+                    year=year,
+                    period=period,
+                    budgeted_resources=Decimal(rng.randint(10, 100)) / 10,
+                    actual_resources=Decimal('0'),
+                ))
+        budgets = ProjectBudget.objects.using(db).bulk_create(budgets, batch_size=BATCH_SIZE)
+        self.stdout.write(f"Created {len(projects)} projects with {len(budgets)} budgets.")
+
+        # Draw allocations at random, keeping every employee within the monthly cap;
+        # the ledger and the budget summaries are filled from the same tallies.
+        allocated = {}
+        assigned = set()
+        resources = []
+        attempts = 0
+        while len(resources) < options['allocations'] and attempts < options['allocations'] * 5:
+            attempts += 1
+            budget = rng.choice(budgets)
+            employee = rng.choice(users)
+            if (budget.pk, employee.pk) in assigned:
+                continue
+            is_intern = rng.random() < 0.05
+            ratio = Decimal('0') if is_intern else rng.choice(ALLOCATION_RATIOS)
+            total = allocated.get((employee.pk, budget.period), Decimal('0')) + ratio
+            if total > MAX_ALLOCATION:
+                continue
+            allocated[(employee.pk, budget.period)] = total
+            assigned.add((budget.pk, employee.pk))
+            budget.actual_resources += ratio
+            budget.intern_count += is_intern
+            resources.append(EmployeeResource(project_budget=budget, employee=employee, allocation_ratio=ratio, is_intern=is_intern))
+
+        EmployeeResource.objects.using(db).bulk_create(resources, batch_size=BATCH_SIZE)
+        EmployeeCapacity.objects.using(db).bulk_create(
+            [EmployeeCapacity(employee_id=employee_id, period=period, allocated=total) for (employee_id, period), total in allocated.items()],
+            batch_size=BATCH_SIZE
+        )
+        ProjectBudget.objects.using(db).bulk_update(budgets, ['actual_resources', 'intern_count'], batch_size=BATCH_SIZE)
+        self.stdout.write(f"Created {len(resources)} allocations.")
+
+        comments = [
+            ProjectComment(project_budget=rng.choice(budgets), user=rng.choice(users), text=rng.choice(COMMENTS))
+            for _ in range(options['comments'])
+        ]
+        ProjectComment.objects.using(db).bulk_create(comments, batch_size=BATCH_SIZE)
+        self.stdout.write(f"Created {len(comments)} comments.")
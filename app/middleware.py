@@ -0,0 +1,253 @@
+"""middleware.py"""
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from functools import partial
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import auth, messages
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache
+from django.db import router
+from django.http import JsonResponse
+from django.shortcuts import redirect
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+from .cache import user_cache_key
+from .permissions import session_capabilities
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_metrics = {}
+
+# The timer of the request being served. Context variables follow the request
+# into the threads the async ORM runs its queries in.
+_current_timer = ContextVar('query_timer', default=None)
+
+class QueryTimer:
+    """Execute wrapper counting the queries run through a connection and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+def timed_execute(execute, sql, params, many, context):
+    """Execute wrapper installed on every connection; times queries for the current request's QueryTimer."""
+    timer = _current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+def _record(view, duration, queries, db_duration, over_budget):
+    with _lock:
+        stats = _metrics.setdefault(view, {
+            'requests': 0,
+            'total_time': 0.0,
+            'max_time': 0.0,
+            'queries': 0,
+            'max_queries': 0,
+            'db_time': 0.0,
+            'over_budget': 0,
+        })
+        stats['requests'] += 1
+        stats['total_time'] += duration
+        stats['max_time'] = max(stats['max_time'], duration)
+        stats['queries'] += queries
+        stats['max_queries'] = max(stats['max_queries'], queries)
+        stats['db_time'] += db_duration
+        stats['over_budget'] += over_budget
+
+def request_metrics():
+    """Per-view request metrics of this process, slowest total time first; times are in milliseconds."""
+    with _lock:
+        snapshot = {view: dict(stats) for view, stats in _metrics.items()}
+
+    metrics = []
+    for view, stats in snapshot.items():
+        requests = stats['requests']
+        metrics.append({
+            'view': view,
+            'requests': requests,
+            'avg_time': round(stats['total_time'] / requests * 1000, 2),
+            'max_time': round(stats['max_time'] * 1000, 2),
+            'total_time': round(stats['total_time'] * 1000, 2),
+            'avg_queries': round(stats['queries'] / requests, 2),
+            'max_queries': stats['max_queries'],
+            'avg_db_time': round(stats['db_time'] / requests * 1000, 2),
+            'over_budget': stats['over_budget'],
+        })
+    metrics.sort(key=lambda stats: stats['total_time'], reverse=True)
+    return metrics
+
+class RequestMetricsMiddleware:
+    """Time every request and count its queries.
+
+    The totals go out in a Server-Timing header and into the per-view metrics
+    served by ``request_metrics``. Requests running more queries than
+    ``settings.QUERY_BUDGET`` are logged as warnings.
+
+    Queries are counted by ``timed_execute``, which is installed on every
+    connection, so queries run by async views in worker threads are counted
+    too. Queries run while a streaming response is consumed happen after the
+    middleware returns and are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timer = QueryTimer()
+        token = _current_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timer.reset(token)
+        return self._finish(request, response, timer, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        token = _current_timer.set(timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timer.reset(token)
+        return self._finish(request, response, timer, time.perf_counter() - start)
+
+    def _finish(self, request, response, timer, duration):
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        budget = getattr(settings, 'QUERY_BUDGET', None)
+        over_budget = budget is not None and timer.count > budget
+        if over_budget:
+            logger.warning(
+                "%s %s (%s) ran %d queries, over the budget of %d.",
+                request.method, request.path, view, timer.count, budget
+            )
+
+        _record(view, duration, timer.count, timer.duration, over_budget)
+        response['Server-Timing'] = (
+            f'db;desc="{timer.count} queries";dur={timer.duration * 1000:.1f}, '
+            f'total;dur={duration * 1000:.1f}'
+        )
+        return response
+
+# The user fields kept in the cache. The password hash stays out of it: only
+# the session auth hash derived from it is stored, and a cached user is rebuilt
+# with the other fields deferred, so they load on access like .only() fields.
+CACHED_USER_FIELDS = ('id', 'username', 'first_name', 'last_name', 'role', 'is_active', 'is_staff', 'is_superuser')
+
+def _load_user(request):
+    user_id = request.session.get(auth.SESSION_KEY)
+    backend = request.session.get(auth.BACKEND_SESSION_KEY)
+    if not settings.AUTH_USER_CACHE_TIMEOUT or user_id is None or backend not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+
+    key = user_cache_key(user_id)
+    cached = cache.get(key)
+    if cached is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache.set(key, {
+                'fields': {field: getattr(user, field) for field in CACHED_USER_FIELDS},
+                'session_hash': user.get_session_auth_hash(),
+            }, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
+
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    if not session_hash or not constant_time_compare(session_hash, cached['session_hash']):
+        # Let Django check the session against the database, and flush it if it is stale.
+        return auth.get_user(request)
+    User = auth.get_user_model()
+    # from_db takes the loaded values in the model's field order.
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in cached['fields']]
+    user = User.from_db(router.db_for_read(User), fields, [cached['fields'][field] for field in fields])
+    user.backend = backend
+    return user
+
+def cached_user(request):
+    """The request's user, from the cache when possible instead of a query per request.
+
+    The cached copy is dropped whenever the user is saved (see signals.py).
+    The session's auth hash is still checked against it, so changing the
+    password logs other sessions out as before.
+    """
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = _load_user(request)
+    return request._cached_user
+
+async def acached_user(request):
+    if not hasattr(request, '_acached_user'):
+        request._acached_user = await sync_to_async(cached_user)(request)
+    return request._acached_user
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware that loads ``request.user`` through ``cached_user``."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: cached_user(request))
+        request.auser = partial(acached_user, request)
+
+class PermissionMiddleware:
+    """Resolve the user's capability set once per request and enforce the capabilities routes require.
+
+    ``request.capabilities`` is computed lazily from the role and cached in
+    the session; on the async path it is resolved up front, since the session
+    cannot be loaded from the event loop.
+    Views marked with ``app.decorators.requires`` are refused before they run
+    when the capability is missing and the user does not own the object;
+    anonymous users are left to the view's login_required.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.capabilities = SimpleLazyObject(lambda: session_capabilities(request))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # Load the user once, asynchronously, and share it with the sync code
+        # and templates that read request.user.
+        request.user = await request.auser()
+        request.capabilities = await sync_to_async(session_capabilities)(request, request.user)
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        capability = getattr(view_func, 'required_capability', None)
+        if capability is None or not request.user.is_authenticated or capability in request.capabilities:
+            return None
+        if view_func.owner_check is not None and view_func.owner_check(request, **view_kwargs):
+            return None
+        if view_func.json_denial:
+            return JsonResponse({'error': 'Forbidden'}, status=403)
+        messages.error(request, "You do not have permission to access that page.")
+        return redirect('dashboard')
@@ -0,0 +1,83 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+
+MAX_ALLOCATION = Decimal('9.99')
+
+
+def text_to_decimal(apps, schema_editor):
+    """Convert the text ratios, refusing to migrate rows that do not fit the new column.
+
+    Every row is checked before any is written, and the migration fails with
+    the ids and values of the rows to fix by hand.
+    """
+    EmployeeResource = apps.get_model('app', 'EmployeeResource')
+    converted = []
+    invalid = []
+    for resource in EmployeeResource.objects.all().iterator():
+        text = (resource.allocation_ratio or '').strip().lower()
+        if text in ('intern', 'interns'):
+            resource.allocation = Decimal('0.00')
+            resource.is_intern = True
+        else:
+            try:
+                resource.allocation = Decimal(text).quantize(Decimal('0.01'))
+            except InvalidOperation:
+                invalid.append(resource)
+                continue
+            if not resource.allocation.is_finite() or not Decimal('0') <= resource.allocation <= MAX_ALLOCATION:
+                invalid.append(resource)
+                continue
+        converted.append(resource)
+
+    if invalid:
+        rows = ', '.join(f"{resource.pk} ({resource.allocation_ratio!r})" for resource in invalid)
+        raise ValueError(
+            f"Cannot convert the allocation ratio of {len(invalid)} employee resource(s) to a number "
+            f"between 0 and {MAX_ALLOCATION}: {rows}. Fix or delete these rows and run the migration again."
+        )
+
+    EmployeeResource.objects.bulk_update(converted, ['allocation', 'is_intern'], batch_size=500)
+
+
+def decimal_to_text(apps, schema_editor):
+    EmployeeResource = apps.get_model('app', 'EmployeeResource')
+    for resource in EmployeeResource.objects.all().iterator():
+        resource.allocation_ratio = 'intern' if resource.is_intern else str(resource.allocation)
+        resource.save(update_fields=['allocation_ratio'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_alter_employeeresource_allocation_ratio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeeresource',
+            name='allocation',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='employeeresource',
+            name='is_intern',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(text_to_decimal, decimal_to_text),
+        migrations.AlterField(
+            model_name='employeeresource',
+            name='allocation_ratio',
+            field=models.CharField(default='0', max_length=10),
+        ),
+        migrations.RemoveField(
+            model_name='employeeresource',
+            name='allocation_ratio',
+        ),
+        migrations.RenameField(
+            model_name='employeeresource',
+            old_name='allocation',
+            new_name='allocation_ratio',
+        ),
+    ]
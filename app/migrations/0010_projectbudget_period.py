@@ -0,0 +1,71 @@
+import calendar
+
+from django.db import migrations, models
+
+
+def populate_period(apps, schema_editor):
+    """Fill the period key from month/year, refusing rows that cannot get one.
+
+    A budget whose month or year cannot be read, or that repeats the project
+    and period of another budget, would be left with a NULL period and drop
+    out of every view. Every row is checked before any is written, and the
+    migration fails with the ids to fix or merge by hand.
+    """
+    ProjectBudget = apps.get_model('app', 'ProjectBudget')
+    months = list(calendar.month_abbr)
+    budgets = {}
+    duplicates = []
+    invalid = []
+    for budget in ProjectBudget.objects.order_by('id').iterator():
+        try:
+            budget.period = int(budget.year) * 12 + months.index(budget.month)
+        except (TypeError, ValueError):
+            invalid.append(budget)
+            continue
+        if budget.month not in months[1:]:
+            invalid.append(budget)
+        elif (budget.project_id, budget.period) in budgets:
+            duplicates.append((budgets[(budget.project_id, budget.period)], budget))
+        else:
+            budgets[(budget.project_id, budget.period)] = budget
+
+    problems = []
+    if invalid:
+        problems.append("unreadable month or year: " + ', '.join(
+            f"{budget.pk} ({budget.month!r} {budget.year!r})" for budget in invalid
+        ))
+    if duplicates:
+        problems.append("same project and month as an earlier budget: " + ', '.join(
+            f"{budget.pk} (duplicates {kept.pk})" for kept, budget in duplicates
+        ))
+    if problems:
+        raise ValueError(
+            f"Cannot set the period of {len(invalid) + len(duplicates)} project budget(s); "
+            f"{'; '.join(problems)}. Fix, merge or delete these rows and run the migration again."
+        )
+
+    ProjectBudget.objects.bulk_update(budgets.values(), ['period'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_employeeresource_decimal_allocation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectbudget',
+            name='period',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_period, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='projectbudget',
+            index=models.Index(fields=['period'], name='projectbudget_period_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='projectbudget',
+            constraint=models.UniqueConstraint(fields=('project', 'period'), name='unique_project_budget_period'),
+        ),
+    ]
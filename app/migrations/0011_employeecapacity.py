@@ -0,0 +1,41 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def populate_capacity(apps, schema_editor):
+    EmployeeResource = apps.get_model('app', 'EmployeeResource')
+    EmployeeCapacity = apps.get_model('app', 'EmployeeCapacity')
+    totals = EmployeeResource.objects.exclude(project_budget__period=None).values(
+        'employee_id', 'project_budget__period'
+    ).annotate(allocated=Sum('allocation_ratio'))
+    EmployeeCapacity.objects.bulk_create([
+        EmployeeCapacity(employee_id=row['employee_id'], period=row['project_budget__period'], allocated=row['allocated'])
+        for row in totals
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_projectbudget_period'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.PositiveIntegerField()),
+                ('allocated', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='capacities', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('employee', 'period'), name='unique_employee_capacity_period')],
+            },
+        ),
+        migrations.RunPython(populate_capacity, migrations.RunPython.noop),
+    ]
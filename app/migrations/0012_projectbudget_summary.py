@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:31
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_summary(apps, schema_editor):
+    ProjectBudget = apps.get_model('app', 'ProjectBudget')
+    budgets = ProjectBudget.objects.annotate(
+        allocated=Sum('employee_resources__allocation_ratio'),
+        interns=Count('employee_resources', filter=Q(employee_resources__is_intern=True))
+    )
+    for budget in budgets.iterator():
+        budget.actual_resources = budget.allocated or 0
+        budget.intern_count = budget.interns
+        budget.save(update_fields=['actual_resources', 'intern_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_employeecapacity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectbudget',
+            name='intern_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='projectbudget',
+            name='actual_resources',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.RunPython(populate_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_projectbudget_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projectcomment',
+            index=models.Index(fields=['project_budget', '-created_at', '-id'], name='comment_budget_created_idx'),
+        ),
+    ]
@@ -1,8 +1,12 @@
 """models.py"""
 
 from django.contrib.auth.models import AbstractUser
+from decimal import Decimal
 from django.db import models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Lower
 from django.conf import settings
+from .utils import period_key
 
 class User(AbstractUser):
     """Custom user model with role attribute."""
@@ -13,6 +17,37 @@ class User(AbstractUser):
     )
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['is_active', 'role', 'username'], name='user_active_role_username_idx'),
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+            models.Index(Lower('first_name'), name='user_first_name_lower_idx'),
+            models.Index(Lower('last_name'), name='user_last_name_lower_idx'),
+        ]
+
+    @classmethod
+    def search(cls, users, prefix='', role=None):
+        """Narrow ``users`` to one role and to usernames, first or last names starting with ``prefix``.
+
+        The prefix match is case-insensitive and written as a range over the
+        lower-cased columns, so the expression indexes can serve it.
+        """
+        if role:
+            users = users.filter(role=role)
+        prefix = prefix.strip().lower()
+        if prefix:
+            end = prefix + '\uffff'
+            users = users.alias(
+                username_lower=Lower('username'),
+                first_name_lower=Lower('first_name'),
+                last_name_lower=Lower('last_name'),
+            ).filter(
+                Q(username_lower__gte=prefix, username_lower__lt=end)
+                | Q(first_name_lower__gte=prefix, first_name_lower__lt=end)
+                | Q(last_name_lower__gte=prefix, last_name_lower__lt=end)
+            )
+        return users.order_by('username')
+
 class Project(models.Model):
     name = models.CharField(max_length=100)
 
@@ -24,9 +59,61 @@ class ProjectBudget(models.Model):
     month = models.CharField(max_length=50, null=True, blank=True)
     year = models.CharField(max_length=50, null=True, blank=True)
     budgeted_resources = models.DecimalField(max_digits=5, decimal_places=2)
-    actual_resources = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
+    actual_resources = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    intern_count = models.PositiveIntegerField(default=0)
     resource_details = models.TextField(null=True, blank=True)
     comments = models.ManyToManyField(settings.AUTH_USER_MODEL, through='ProjectComment', related_name='commented_projects', blank=True)
+    period = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'period'], name='unique_project_budget_period'),
+        ]
+        indexes = [
+            models.Index(fields=['period'], name='projectbudget_period_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Keep the period key in sync with the month and year labels."""
+        self.period = period_key(self.month, self.year) if self.month and self.year else None
+        super().save(*args, **kwargs)
+
+    @property
+    def profit_rating(self):
+        """Budgeted minus actual resources."""
+        return Decimal(str(self.budgeted_resources)) - (self.actual_resources or Decimal('0'))
+
+    @property
+    def profit_loss_percentage(self):
+        """Profit rating as a percentage of the budgeted resources."""
+        budgeted = Decimal(str(self.budgeted_resources))
+        if budgeted == 0:
+            return None
+        return self.profit_rating / budgeted * 100
+
+    @classmethod
+    def refresh_summaries(cls, budget_ids):
+        """Recompute the stored summaries of many budgets with one grouped query."""
+        budgets = list(cls.objects.filter(pk__in=budget_ids).annotate(
+            allocated=Sum('employee_resources__allocation_ratio'),
+            interns=Count('employee_resources', filter=Q(employee_resources__is_intern=True))
+        ))
+        for budget in budgets:
+            budget.actual_resources = budget.allocated or Decimal('0')
+            budget.intern_count = budget.interns
+        cls.objects.bulk_update(budgets, ['actual_resources', 'intern_count'])
+
+    @classmethod
+    def refresh_summary(cls, budget_id):
+        """Recompute the stored actual resources and intern count of a budget."""
+        totals = EmployeeResource.objects.filter(project_budget_id=budget_id).aggregate(
+            actual=Sum('allocation_ratio'),
+            interns=Count('pk', filter=Q(is_intern=True))
+        )
+        cls.objects.filter(pk=budget_id).update(
+            actual_resources=totals['actual'] or Decimal('0'),
+            intern_count=totals['interns']
+        )
 
     def __str__(self):
         return f"{self.project.name} - {self.month} {self.year}"
@@ -37,16 +124,119 @@ class ProjectComment(models.Model):
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Serves the newest-first keyset pagination of a budget's comments.
+            models.Index(fields=['project_budget', '-created_at', '-id'], name='comment_budget_created_idx'),
+        ]
+
     def __str__(self):
         return f"Comment by {self.user.username} on {self.project_budget}"
 
 class EmployeeResource(models.Model):
     project_budget = models.ForeignKey(ProjectBudget, related_name='employee_resources', on_delete=models.CASCADE)
     employee = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    allocation_ratio = models.CharField(max_length=10)
+    allocation_ratio = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    is_intern = models.BooleanField(default=False)
 
     class Meta:
         unique_together = ('project_budget', 'employee')
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Kept so the signal handlers can also refresh the employee and budget
+        # an allocation is moved away from.
+        instance._loaded_keys = (instance.__dict__.get('employee_id'), instance.__dict__.get('project_budget_id'))
+        return instance
+
+    @property
+    def allocation_display(self):
+        """Allocation as entered by users: the ratio, or 'intern'."""
+        return 'intern' if self.is_intern else self.allocation_ratio
+
+    def __str__(self):
+        return f"{self.employee.username} - {self.project_budget} ({self.allocation_display})"
+
+class EmployeeCapacity(models.Model):
+    """Ledger of the total allocation per employee and period.
+
+    Kept in sync with EmployeeResource by the signal handlers in signals.py,
+    so capacity checks read a single row instead of summing allocations.
+    """
+    employee = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='capacities', on_delete=models.CASCADE)
+    period = models.PositiveIntegerField()
+    allocated = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'period'], name='unique_employee_capacity_period'),
+        ]
+
+    @classmethod
+    def allocated_for(cls, employee_id, period):
+        """Return the total allocation of an employee in a period."""
+        allocated = cls.objects.filter(employee_id=employee_id, period=period).values_list('allocated', flat=True).first()
+        return allocated or Decimal('0')
+
+    @classmethod
+    async def aallocated_for(cls, employee_id, period):
+        """Async variant of ``allocated_for``."""
+        allocated = await cls.objects.filter(employee_id=employee_id, period=period).values_list('allocated', flat=True).afirst()
+        return allocated or Decimal('0')
+
+    @classmethod
+    def refresh(cls, employee_id, period):
+        """Recompute the ledger row for an employee and period from EmployeeResource.
+
+        The row is deleted when the total is 0; the ledger holds no empty rows.
+        """
+        if period is None:
+            return
+        allocated = EmployeeResource.objects.filter(
+            employee_id=employee_id,
+            project_budget__period=period
+        ).aggregate(total=Sum('allocation_ratio'))['total']
+
+        if not allocated:
+            cls.objects.filter(employee_id=employee_id, period=period).delete()
+        else:
+            cls.objects.update_or_create(employee_id=employee_id, period=period, defaults={'allocated': allocated})
+
+    @classmethod
+    def refresh_many(cls, pairs):
+        """Recompute the ledger rows for many ``(employee_id, period)`` pairs.
+
+        Used after bulk writes, which do not send the signals that keep the
+        ledger in sync. Runs one grouped query and one upsert, then deletes
+        the rows left at 0 like ``refresh`` does, including empty rows other
+        writers created only to lock them.
+        """
+        pairs = {(employee_id, period) for employee_id, period in pairs if period is not None}
+        if not pairs:
+            return
+        totals = EmployeeResource.objects.filter(
+            employee_id__in={employee_id for employee_id, _ in pairs},
+            project_budget__period__in={period for _, period in pairs}
+        ).values('employee_id', 'project_budget__period').annotate(total=Sum('allocation_ratio'))
+        allocated = {
+            (row['employee_id'], row['project_budget__period']): row['total']
+            for row in totals
+        }
+        cls.objects.bulk_create(
+            [
+                cls(employee_id=employee_id, period=period, allocated=allocated.get((employee_id, period), 0))
+                for employee_id, period in pairs
+            ],
+            update_conflicts=True,
+            unique_fields=['employee', 'period'],
+            update_fields=['allocated'],
+        )
+        cls.objects.filter(
+            employee_id__in={employee_id for employee_id, _ in pairs},
+            period__in={period for _, period in pairs},
+            allocated=0
+        ).delete()
+
     def __str__(self):
-        return f"{self.employee.username} - {self.project_budget} ({self.allocation_ratio})"
+        return f"{self.employee.username} - {self.period} ({self.allocated})"
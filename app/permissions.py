@@ -0,0 +1,71 @@
+"""permissions.py"""
+
+from .models import ProjectComment
+
+# What each role may do. Views are gated on these capabilities (see
+# ``app.decorators.requires`` and PermissionMiddleware) and templates read
+# them through the ``can`` flags instead of comparing roles.
+ROLE_CAPABILITIES = {
+    'Manager': frozenset({
+        'manage_projects',
+        'manage_budgets',
+        'manage_resources',
+        'manage_employees',
+        'moderate_comments',
+        'view_resources',
+        'view_utilization',
+        'view_portfolio',
+        'view_metrics',
+    }),
+    'Team Lead': frozenset({
+        'manage_resources',
+        'manage_employees',
+        'moderate_comments',
+        'view_resources',
+        'view_utilization',
+    }),
+    'Employee': frozenset(),
+}
+
+# Dashboard a user lands on: the first whose capability they hold, else the
+# employee dashboard.
+DASHBOARDS = (
+    ('manage_projects', 'Manager'),
+    ('manage_employees', 'Team Lead'),
+)
+
+SESSION_KEY = '_capabilities'
+
+def capabilities_for(user):
+    """Capability set of a user, from their role."""
+    if not user.is_authenticated:
+        return frozenset()
+    return ROLE_CAPABILITIES.get(user.role, frozenset())
+
+def session_capabilities(request, user=None):
+    """Capability set of the request's user, cached in the session per user and role."""
+    user = user or request.user
+    if not user.is_authenticated:
+        return frozenset()
+
+    cached = request.session.get(SESSION_KEY)
+    if cached and cached['user'] == user.pk and cached['role'] == user.role:
+        return frozenset(cached['capabilities'])
+
+    capabilities = capabilities_for(user)
+    request.session[SESSION_KEY] = {'user': user.pk, 'role': user.role, 'capabilities': sorted(capabilities)}
+    return capabilities
+
+def can(request, capability):
+    return capability in request.capabilities
+
+def dashboard_for(request):
+    """Name of the request user's dashboard, from their capabilities."""
+    for capability, dashboard in DASHBOARDS:
+        if can(request, capability):
+            return dashboard
+    return 'Employee'
+
+def owns_comment(request, comment_id):
+    """Whether the request user wrote the comment; an owner check for ``requires``."""
+    return ProjectComment.objects.filter(pk=comment_id, user_id=request.user.pk).exists()
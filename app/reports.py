@@ -0,0 +1,213 @@
+"""reports.py"""
+
+import base64
+import csv
+from array import array
+from datetime import datetime
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db.models import Count, DecimalField, Q, Sum
+from django.db.models.functions import Coalesce
+from .models import EmployeeCapacity, EmployeeResource, ProjectBudget, ProjectComment
+
+User = get_user_model()
+
+TWO_PLACES = Decimal('0.01')
+EXPORT_CHUNK_SIZE = 2000
+COMMENTS_PAGE_SIZE = 20
+
+def allocation_overview(allocations, page_number=1, per_page=50):
+    """Group allocations per employee, one page of employees at a time.
+
+    Per-employee totals come from a single grouped query and the project
+    breakdown for the employees on the page from a single detail query.
+
+    Returns a ``(page, rows)`` tuple where each row holds the employee id,
+    username, total allocation and the list of projects.
+    """
+    totals = allocations.values('employee_id', 'employee__username').annotate(
+        allocated=Sum('allocation_ratio')
+    ).order_by('employee__username', 'employee_id')
+
+    page = Paginator(totals, per_page).get_page(page_number)
+
+    rows = {}
+    for total in page.object_list:
+        rows[total['employee_id']] = {
+            'employee_id': total['employee_id'],
+            'username': total['employee__username'],
+            'allocated': total['allocated'],
+            'projects': [],
+        }
+
+    details = allocations.filter(employee_id__in=rows).values(
+        'employee_id',
+        'allocation_ratio',
+        'is_intern',
+        'project_budget__project__name',
+        'project_budget__month',
+        'project_budget__year',
+    ).order_by('project_budget__period', 'project_budget__project__name')
+
+    for detail in details:
+        rows[detail['employee_id']]['projects'].append({
+            'project': detail['project_budget__project__name'],
+            'allocation_ratio': 'intern' if detail['is_intern'] else detail['allocation_ratio'],
+            'month': detail['project_budget__month'],
+            'year': detail['project_budget__year'],
+        })
+
+    return page, list(rows.values())
+
+def portfolio_summary(start_period, end_period):
+    """Budgeted vs actual resources per project over a period range.
+
+    One grouped query over ProjectBudget; the actual resources and intern
+    counts come from the summary kept on each budget, so no allocation rows
+    are read.
+    """
+    totals = ProjectBudget.objects.filter(period__range=(start_period, end_period)).values(
+        'project_id', 'project__name'
+    ).annotate(
+        budgeted=Sum('budgeted_resources'),
+        actual=Coalesce(Sum('actual_resources'), Decimal('0'), output_field=DecimalField()),
+        interns=Sum('intern_count'),
+        periods=Count('pk'),
+    ).order_by('project__name', 'project_id')
+
+    projects = []
+    for total in totals:
+        budgeted = total['budgeted'].quantize(TWO_PLACES)
+        actual = total['actual'].quantize(TWO_PLACES)
+        profit = budgeted - actual
+        projects.append({
+            'project_id': total['project_id'],
+            'name': total['project__name'],
+            'budgeted': budgeted,
+            'actual': actual,
+            'interns': total['interns'],
+            'periods': total['periods'],
+            'profit': profit,
+            'profit_percentage': (profit / budgeted * 100).quantize(TWO_PLACES) if budgeted else None,
+        })
+    return projects
+
+def utilization_matrix(start_period, end_period, project_id=None):
+    """Dense employees x months utilization matrix over a period range.
+
+    The allocations come from one grouped query: the capacity ledger for the
+    whole portfolio, or the allocations of a single project. They are pivoted
+    into one flat ``array('d')`` of ``len(employees) * len(periods)`` cells in
+    row-major order; ``matrix_row`` slices out an employee's row.
+
+    Returns a dict with the ``periods`` keys, the ``employees`` as
+    ``(id, username)`` tuples and the ``cells``. With a project filter only
+    the employees allocated to the project in the range are included.
+    """
+    periods = list(range(start_period, end_period + 1))
+
+    if project_id is None:
+        employees = User.objects.filter(is_active=True)
+        totals = EmployeeCapacity.objects.filter(period__range=(start_period, end_period)).values_list(
+            'employee_id', 'period', 'allocated'
+        )
+    else:
+        employees = User.objects.filter(
+            employeeresource__project_budget__project_id=project_id,
+            employeeresource__project_budget__period__range=(start_period, end_period)
+        ).distinct()
+        totals = EmployeeResource.objects.filter(
+            project_budget__project_id=project_id,
+            project_budget__period__range=(start_period, end_period)
+        ).values_list('employee_id', 'project_budget__period').annotate(allocated=Sum('allocation_ratio')).order_by()
+    employees = list(employees.order_by('username', 'id').values_list('id', 'username'))
+
+    width = len(periods)
+    rows = {employee_id: index * width for index, (employee_id, _) in enumerate(employees)}
+    cells = array('d', [0.0]) * (len(employees) * width)
+    for employee_id, period, allocated in totals:
+        offset = rows.get(employee_id)
+        if offset is not None:
+            cells[offset + period - start_period] = float(allocated)
+
+    return {'periods': periods, 'employees': employees, 'cells': cells}
+
+def matrix_row(matrix, index):
+    """The utilization cells of the employee at ``index`` of a utilization matrix."""
+    width = len(matrix['periods'])
+    return matrix['cells'][index * width:(index + 1) * width]
+
+def encode_comment_cursor(comment):
+    """Opaque cursor pointing just past ``comment`` in newest-first order."""
+    return base64.urlsafe_b64encode(f"{comment.created_at.isoformat()}|{comment.id}".encode()).decode()
+
+def decode_comment_cursor(cursor):
+    try:
+        created_at, comment_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(comment_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+def comments_page(budget_id, cursor=None, per_page=COMMENTS_PAGE_SIZE):
+    """One page of a budget's comments, newest first, with their users joined in.
+
+    Pages are keyed on ``(created_at, id)`` rather than offsets, so every page
+    costs one indexed query however long the history is. Returns a
+    ``(comments, next_cursor)`` tuple; ``next_cursor`` is None on the last page.
+    Raises ValueError for a malformed cursor.
+    """
+    comments = ProjectComment.objects.filter(project_budget_id=budget_id).select_related('user')
+    if cursor:
+        created_at, comment_id = decode_comment_cursor(cursor)
+        comments = comments.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=comment_id))
+
+    # Fetch one extra comment to know whether another page follows.
+    comments = list(comments.order_by('-created_at', '-id')[:per_page + 1])
+    if len(comments) > per_page:
+        return comments[:per_page], encode_comment_cursor(comments[per_page - 1])
+    return comments, None
+
+class _Echo:
+    """File-like object whose write() hands back the CSV line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+def stream_csv(header, rows):
+    """Yield CSV lines one at a time, for use with StreamingHttpResponse."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+ALLOCATION_EXPORT_HEADER = ['Employee', 'Project Name', 'Month', 'Year', 'Allocation Ratio']
+
+def allocation_export_rows(allocations):
+    """Allocation rows for the CSV export, read from the database in chunks."""
+    rows = allocations.order_by('project_budget__period', 'employee__username', 'pk').values_list(
+        'employee__username',
+        'project_budget__project__name',
+        'project_budget__month',
+        'project_budget__year',
+        'allocation_ratio',
+        'is_intern',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for username, project, month, year, allocation_ratio, is_intern in rows:
+        yield [username, project, month, year, 'intern' if is_intern else allocation_ratio]
+
+BUDGET_EXPORT_HEADER = ['Project Name', 'Month', 'Year', 'Budgeted Resources', 'Actual Resources', 'Interns', 'Profit Rating']
+
+def budget_export_rows(budgets):
+    """Budget rows with their stored P&L summary for the CSV export, read in chunks."""
+    rows = budgets.order_by('period', 'project__name', 'pk').values_list(
+        'project__name',
+        'month',
+        'year',
+        'budgeted_resources',
+        'actual_resources',
+        'intern_count',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for project, month, year, budgeted, actual, interns in rows:
+        actual = (actual or Decimal('0')).quantize(TWO_PLACES)
+        yield [project, month, year, budgeted, actual, interns, budgeted - actual]
@@ -0,0 +1,442 @@
+"""services.py"""
+
+import csv
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Sum
+from .cache import invalidate_dashboards, invalidate_portfolio
+from .forms import validate_allocation_ratio
+from .models import EmployeeCapacity, EmployeeResource, ProjectBudget
+from .utils import month_input_key, parse_period, period_from_key, period_label
+
+User = get_user_model()
+
+MAX_ALLOCATION = Decimal('1')
+
+def _reserve_capacity(employee_id, period, delta):
+    """Add ``delta`` to the employee's ledger row for the period, refusing to go over the cap.
+
+    The ledger row is locked with select_for_update where the backend supports
+    it, and the increment is a single guarded UPDATE so two writers can never
+    both pass the check, even on backends without row locks.
+    """
+    capacity, _ = EmployeeCapacity.objects.select_for_update().get_or_create(employee_id=employee_id, period=period)
+    reserved = EmployeeCapacity.objects.filter(pk=capacity.pk)
+    if delta > 0:
+        reserved = reserved.filter(allocated__lte=MAX_ALLOCATION - delta)
+    return reserved.update(allocated=F('allocated') + delta) == 1
+
+def _lock_capacity(pairs):
+    """Lock the ledger rows of ``(employee_id, period)`` pairs and return their allocated totals.
+
+    Missing rows are created first, so concurrent writers adding an employee
+    to a month they had nothing in yet queue on the same row instead of both
+    reading 0. Callers hand the same pairs to ``_after_bulk_allocation_write``,
+    whose ledger refresh deletes the rows that stayed empty.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return {}
+    EmployeeCapacity.objects.bulk_create(
+        [EmployeeCapacity(employee_id=employee_id, period=period) for employee_id, period in pairs],
+        ignore_conflicts=True
+    )
+    rows = EmployeeCapacity.objects.select_for_update().filter(
+        employee_id__in={employee_id for employee_id, _ in pairs},
+        period__in={period for _, period in pairs}
+    ).values_list('employee_id', 'period', 'allocated')
+    return {(employee_id, period): allocated for employee_id, period, allocated in rows if (employee_id, period) in pairs}
+
+def _after_bulk_allocation_write(pairs=(), budget_ids=()):
+    """Redo what the model signals would have done after a bulk write.
+
+    bulk_create, bulk_update and queryset deletes send no post_save or
+    post_delete, so the handlers in signals.py never keep the capacity ledger,
+    the budgets' P&L summaries and the cached reports in step. Every bulk path
+    calls this once its writes are done, with the ``(employee_id, period)``
+    pairs and the budget ids it touched.
+    """
+    EmployeeCapacity.refresh_many(pairs)
+    if budget_ids:
+        ProjectBudget.refresh_summaries(budget_ids)
+    invalidate_dashboards()
+    invalidate_portfolio()
+
+def check_allocations(proposals):
+    """Check proposed allocations against the monthly cap with one grouped query.
+
+    ``proposals`` is a list of ``(employee_id, period, allocation_ratio,
+    budget_id)`` tuples. A proposal with a budget replaces the employee's
+    current allocation on that budget, one without is added to the month.
+    Proposals for the same employee and month are checked together, as a
+    single save of the grid would apply them.
+
+    Returns one dict per proposal with the employee's ``allocated`` total
+    before the change, the ``remaining`` capacity after all the proposals for
+    that month, and the ``conflict`` flag.
+    """
+    allocated, current = {}, {}
+    for employee_id, period, budget_id, total in EmployeeResource.objects.filter(
+        employee_id__in={proposal[0] for proposal in proposals},
+        project_budget__period__in={proposal[1] for proposal in proposals}
+    ).values_list('employee_id', 'project_budget__period', 'project_budget_id').annotate(
+        total=Sum('allocation_ratio')
+    ).order_by():
+        allocated[(employee_id, period)] = allocated.get((employee_id, period), Decimal('0')) + total
+        current[(employee_id, period, budget_id)] = total
+
+    projected = dict(allocated)
+    for employee_id, period, allocation_ratio, budget_id in proposals:
+        replaced = current.get((employee_id, period, budget_id), Decimal('0')) if budget_id else Decimal('0')
+        projected[(employee_id, period)] = projected.get((employee_id, period), Decimal('0')) + allocation_ratio - replaced
+
+    results = []
+    for employee_id, period, allocation_ratio, budget_id in proposals:
+        remaining = (MAX_ALLOCATION - projected[(employee_id, period)]).quantize(Decimal('0.01'))
+        results.append({
+            'allocated': allocated.get((employee_id, period), Decimal('0')).quantize(Decimal('0.01')),
+            'remaining': remaining,
+            'conflict': remaining < 0,
+        })
+    return results
+
+@transaction.atomic
+def save_allocation(resource, allocation_ratio, is_intern):
+    """Create or update an employee allocation, enforcing the monthly cap.
+
+    Raises ValidationError when the employee would go over 1.0 in the period,
+    and IntegrityError when the employee is already assigned to the budget.
+    """
+    previous = Decimal('0')
+    if resource.pk:
+        # The stored ratio only counts against the same employee and month;
+        # a reassigned allocation is reserved in full on its new ledger row.
+        previous = EmployeeResource.objects.select_for_update().filter(
+            pk=resource.pk,
+            employee_id=resource.employee_id,
+            project_budget__period=resource.project_budget.period
+        ).values_list('allocation_ratio', flat=True).first() or Decimal('0')
+
+    allocation_ratio = Decimal('0') if is_intern else allocation_ratio
+    if not _reserve_capacity(resource.employee_id, resource.project_budget.period, allocation_ratio - previous):
+        raise ValidationError(
+            f"Total allocation ratio cannot exceed 1 for {resource.employee.username} in "
+            f"{resource.project_budget.month} {resource.project_budget.year}."
+        )
+
+    resource.allocation_ratio = allocation_ratio
+    resource.is_intern = is_intern
+    resource.save()
+    return resource
+
+@transaction.atomic
+def delete_allocation(resource):
+    """Delete an employee allocation; the capacity ledger is updated in the same transaction."""
+    resource.delete()
+
+@transaction.atomic
+def save_allocation_grid(project_budget, changes, additions):
+    """Apply every change to a project budget's allocations in one transaction.
+
+    ``changes`` maps allocation ids to a ``(ratio, is_intern)`` tuple, or to
+    None to delete the allocation; ``additions`` is a list of ``(employee,
+    ratio, is_intern)`` tuples. The monthly cap of every affected employee is
+    checked against the ledger, locked in one query, and nothing is written
+    unless all of them pass.
+
+    Raises ValidationError listing every employee that would go over 1.0 or is
+    already assigned. Returns the ``created``, ``updated`` and ``deleted``
+    counts.
+    """
+    current = {
+        resource.pk: resource
+        for resource in EmployeeResource.objects.select_for_update().filter(
+            project_budget=project_budget
+        ).select_related('employee')
+    }
+    usernames = {resource.employee_id: resource.employee.username for resource in current.values()}
+    usernames.update({employee.pk: employee.username for employee, _, _ in additions})
+    pairs = {(employee_id, project_budget.period) for employee_id in usernames}
+    allocated = {employee_id: total for (employee_id, _), total in _lock_capacity(pairs).items()}
+
+    errors = []
+    deltas = {}
+    to_update, to_delete, to_create = [], [], []
+    for resource_id, change in changes.items():
+        # Allocations deleted by someone else since the grid was loaded are gone already.
+        resource = current.get(resource_id)
+        if resource is None:
+            continue
+        if change is None:
+            to_delete.append(resource.pk)
+            deltas[resource.employee_id] = deltas.get(resource.employee_id, Decimal('0')) - resource.allocation_ratio
+            continue
+        allocation_ratio, is_intern = change
+        allocation_ratio = Decimal('0') if is_intern else allocation_ratio
+        if (allocation_ratio, is_intern) == (resource.allocation_ratio, resource.is_intern):
+            continue
+        deltas[resource.employee_id] = deltas.get(resource.employee_id, Decimal('0')) + allocation_ratio - resource.allocation_ratio
+        resource.allocation_ratio, resource.is_intern = allocation_ratio, is_intern
+        to_update.append(resource)
+
+    assigned = {resource.employee_id for resource in current.values()}
+    for employee, allocation_ratio, is_intern in additions:
+        if employee.pk in assigned:
+            errors.append(f"{employee.username} is already assigned to this project budget.")
+            continue
+        assigned.add(employee.pk)
+        allocation_ratio = Decimal('0') if is_intern else allocation_ratio
+        deltas[employee.pk] = deltas.get(employee.pk, Decimal('0')) + allocation_ratio
+        to_create.append(EmployeeResource(
+            project_budget=project_budget,
+            employee=employee,
+            allocation_ratio=allocation_ratio,
+            is_intern=is_intern
+        ))
+
+    for employee_id, delta in deltas.items():
+        if delta > 0 and allocated.get(employee_id, Decimal('0')) + delta > MAX_ALLOCATION:
+            errors.append(
+                f"Total allocation ratio cannot exceed 1 for {usernames[employee_id]} in "
+                f"{project_budget.month} {project_budget.year}."
+            )
+    if errors:
+        raise ValidationError(errors)
+
+    EmployeeResource.objects.bulk_update(to_update, ['allocation_ratio', 'is_intern'])
+    if to_delete:
+        EmployeeResource.objects.filter(pk__in=to_delete).delete()
+    EmployeeResource.objects.bulk_create(to_create)
+
+    if pairs:
+        _after_bulk_allocation_write(pairs, [project_budget.pk] if deltas else ())
+    return {'created': len(to_create), 'updated': len(to_update), 'deleted': len(to_delete)}
+
+@transaction.atomic
+def save_budget_plan(project, budgets_by_period, copy_forward=False):
+    """Create or update a project's budgets for several periods in one transaction.
+
+    ``budgets_by_period`` maps period keys to budgeted resources; None leaves
+    the period untouched, or takes the previous month's value when
+    ``copy_forward`` is set. Returns the ``(created, updated)`` counts.
+    """
+    values = {}
+    previous = None
+    for period in sorted(budgets_by_period):
+        value = budgets_by_period[period]
+        if value is None and copy_forward:
+            value = previous
+        if value is not None:
+            values[period] = previous = value
+
+    existing = {
+        budget.period: budget
+        for budget in ProjectBudget.objects.select_for_update().filter(project=project, period__in=values)
+    }
+
+    to_create, to_update = [], []
+    for period, value in values.items():
+        budget = existing.get(period)
+        if budget is None:
+            month, year = period_from_key(period)
+            to_create.append(ProjectBudget(project=project, month=month, year=year, period=period, budgeted_resources=value))
+        elif budget.budgeted_resources != value:
+            budget.budgeted_resources = value
+            to_update.append(budget)
+
+    ProjectBudget.objects.bulk_create(to_create)
+    ProjectBudget.objects.bulk_update(to_update, ['budgeted_resources'])
+    if to_create or to_update:
+        # The budgeted resources do not enter the stored summaries; only the caches go stale.
+        _after_bulk_allocation_write()
+    return len(to_create), len(to_update)
+
+@transaction.atomic
+def roll_forward_allocations(source_period, project=None):
+    """Copy the allocations of a period into the next one, for a project or every project.
+
+    Employees already assigned in the target month are left alone. Allocations
+    of inactive employees, whose project has no budget in the target month, or
+    that would take the employee over 1.0, are skipped and reported, so every
+    source allocation shows up in the report. The target month's capacity is
+    locked and read from the ledger in one query and the copies are written
+    with bulk_create.
+
+    Returns a report dict with the number of ``created`` and ``existing``
+    allocations and a list of ``skipped`` messages.
+    """
+    target_period = source_period + 1
+    report = {'created': 0, 'existing': 0, 'skipped': []}
+
+    sources = EmployeeResource.objects.filter(project_budget__period=source_period)
+    if project is not None:
+        sources = sources.filter(project_budget__project=project)
+    sources = list(sources.order_by('project_budget__project__name', 'employee__username').values_list(
+        'project_budget__project_id',
+        'project_budget__project__name',
+        'employee_id',
+        'employee__username',
+        'employee__is_active',
+        'allocation_ratio',
+        'is_intern',
+    ))
+    if not sources:
+        return report
+
+    budgets = dict(ProjectBudget.objects.filter(
+        period=target_period,
+        project_id__in={source[0] for source in sources}
+    ).values_list('project_id', 'id'))
+    assigned = set(EmployeeResource.objects.filter(
+        project_budget_id__in=set(budgets.values())
+    ).values_list('project_budget_id', 'employee_id'))
+    pairs = {(source[2], target_period) for source in sources if source[4]}
+    allocated = {employee_id: total for (employee_id, _), total in _lock_capacity(pairs).items()}
+
+    resources = []
+    for project_id, project_name, employee_id, username, is_active, allocation_ratio, is_intern in sources:
+        if not is_active:
+            report['skipped'].append(f"Skipped {username} in {project_name}: employee inactive.")
+            continue
+        budget_id = budgets.get(project_id)
+        if budget_id is None:
+            report['skipped'].append(f"No budget for {project_name} in {period_label(target_period)}.")
+            continue
+        if (budget_id, employee_id) in assigned:
+            report['existing'] += 1
+            continue
+        total = allocated.get(employee_id, Decimal('0')) + allocation_ratio
+        if total > MAX_ALLOCATION:
+            report['skipped'].append(
+                f"Total allocation ratio cannot exceed 1 for {username} in {period_label(target_period)} "
+                f"({project_name})."
+            )
+            continue
+
+        allocated[employee_id] = total
+        resources.append(EmployeeResource(
+            project_budget_id=budget_id,
+            employee_id=employee_id,
+            allocation_ratio=allocation_ratio,
+            is_intern=is_intern
+        ))
+
+    EmployeeResource.objects.bulk_create(resources)
+    _after_bulk_allocation_write(pairs, {resource.project_budget_id for resource in resources})
+    report['created'] = len(resources)
+    return report
+
+IMPORT_COLUMNS = ('project', 'period', 'employee', 'allocation_ratio')
+
+def read_allocation_csv(file):
+    """Return a lazy row reader over an allocation CSV, checking its header first."""
+    reader = csv.DictReader(file)
+    missing = [column for column in IMPORT_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValidationError(f"Missing CSV columns: {', '.join(missing)}.")
+    return reader
+
+def _import_period(value):
+    """Accept both the 'Oct 2026' labels used in the app and '2026-10'."""
+    try:
+        return parse_period(value)
+    except ValueError:
+        try:
+            return month_input_key(value)
+        except ValueError:
+            raise ValidationError(f"Invalid period {value!r}; use 'Oct 2026' or '2026-10'.")
+
+@transaction.atomic
+def _import_batch(batch, report):
+    """Validate and insert one batch of rows inside a single transaction."""
+    parsed = []
+    for line, row in batch:
+        try:
+            project_name = (row.get('project') or '').strip()
+            username = (row.get('employee') or '').strip()
+            if not project_name or not username:
+                raise ValidationError("Project and employee are required.")
+            period = _import_period((row.get('period') or '').strip())
+            allocation_ratio, is_intern = validate_allocation_ratio(row.get('allocation_ratio') or '')
+        except ValidationError as e:
+            report['errors'].append({'line': line, 'error': e.messages[0]})
+            continue
+        parsed.append((line, project_name, period, username, allocation_ratio, is_intern))
+
+    if not parsed:
+        return
+
+    budgets = {}
+    for name, period, budget_id in ProjectBudget.objects.filter(
+        project__name__in={row[1] for row in parsed},
+        period__in={row[2] for row in parsed}
+    ).order_by('-id').values_list('project__name', 'period', 'id'):
+        budgets[(name, period)] = budget_id
+    employees = dict(User.objects.filter(
+        username__in={row[3] for row in parsed},
+        is_active=True
+    ).values_list('username', 'id'))
+
+    assigned = set(EmployeeResource.objects.filter(
+        project_budget_id__in=set(budgets.values()),
+        employee_id__in=set(employees.values())
+    ).values_list('project_budget_id', 'employee_id'))
+    pairs = {(employees[row[3]], row[2]) for row in parsed if row[3] in employees}
+    allocated = _lock_capacity(pairs)
+
+    resources = []
+    for line, project_name, period, username, allocation_ratio, is_intern in parsed:
+        budget_id = budgets.get((project_name, period))
+        employee_id = employees.get(username)
+        if budget_id is None:
+            error = f"No budget for {project_name} in {period_label(period)}."
+        elif employee_id is None:
+            error = f"Unknown or inactive employee {username}."
+        elif (budget_id, employee_id) in assigned:
+            error = f"{username} is already assigned to {project_name} in {period_label(period)}."
+        elif allocated.get((employee_id, period), Decimal('0')) + allocation_ratio > MAX_ALLOCATION:
+            error = f"Total allocation ratio cannot exceed 1 for {username} in {period_label(period)}."
+        else:
+            error = None
+
+        if error:
+            report['errors'].append({'line': line, 'error': error})
+            continue
+
+        assigned.add((budget_id, employee_id))
+        allocated[(employee_id, period)] = allocated.get((employee_id, period), Decimal('0')) + allocation_ratio
+        resources.append(EmployeeResource(
+            project_budget_id=budget_id,
+            employee_id=employee_id,
+            allocation_ratio=allocation_ratio,
+            is_intern=is_intern
+        ))
+
+    EmployeeResource.objects.bulk_create(resources)
+    if pairs:
+        _after_bulk_allocation_write(pairs, {resource.project_budget_id for resource in resources})
+    report['created'] += len(resources)
+
+def import_allocations(rows, batch_size=500):
+    """Import allocation rows (dicts keyed by IMPORT_COLUMNS) in chunked transactions.
+
+    Rows are consumed lazily, validated a batch at a time against the same
+    rules as EmployeeResourceForm and the monthly cap, and written with
+    bulk_create. Invalid rows are skipped and reported.
+
+    Returns a report dict with the number of ``created`` rows and a list of
+    ``errors``, each holding the CSV ``line`` and the ``error`` message.
+    """
+    report = {'created': 0, 'errors': []}
+    batch = []
+    for line, row in enumerate(rows, start=2):
+        batch.append((line, row))
+        if len(batch) >= batch_size:
+            _import_batch(batch, report)
+            batch = []
+    if batch:
+        _import_batch(batch, report)
+    report['errors'].sort(key=lambda error: error['line'])
+    return report
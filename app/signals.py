@@ -0,0 +1,66 @@
+"""signals.py"""
+
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import invalidate_dashboards, invalidate_portfolio, invalidate_user
+from .middleware import timed_execute
+from .models import EmployeeCapacity, EmployeeResource, Project, ProjectBudget
+
+User = get_user_model()
+
+def _budget_period(resource):
+    """Period of the resource's budget, without loading the budget when it is not cached."""
+    if EmployeeResource.project_budget.is_cached(resource):
+        return resource.project_budget.period
+    return ProjectBudget.objects.filter(pk=resource.project_budget_id).values_list('period', flat=True).first()
+
+@receiver(post_save, sender=EmployeeResource)
+@receiver(post_delete, sender=EmployeeResource)
+def sync_employee_capacity(sender, instance, **kwargs):
+    """Keep the capacity ledger and the budget's P&L summary in step with allocation writes."""
+    EmployeeCapacity.refresh(instance.employee_id, _budget_period(instance))
+    ProjectBudget.refresh_summary(instance.project_budget_id)
+
+    # A reassigned allocation also frees the employee and budget it was moved from.
+    keys = (instance.employee_id, instance.project_budget_id)
+    original = getattr(instance, '_loaded_keys', keys)
+    if original != keys and None not in original:
+        employee_id, budget_id = original
+        period = ProjectBudget.objects.filter(pk=budget_id).values_list('period', flat=True).first()
+        EmployeeCapacity.refresh(employee_id, period)
+        if budget_id != instance.project_budget_id:
+            ProjectBudget.refresh_summary(budget_id)
+    instance._loaded_keys = keys
+    invalidate_portfolio()
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=ProjectBudget)
+@receiver(post_delete, sender=ProjectBudget)
+def invalidate_project_caches(sender, **kwargs):
+    """Drop the cached dashboards and portfolio reports when projects or budgets change."""
+    invalidate_dashboards()
+    invalidate_portfolio()
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_employee_reports(sender, update_fields=None, **kwargs):
+    """Drop the cached utilization heatmaps, which list every active employee."""
+    # Logins only touch last_login; don't let them churn the cache.
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    invalidate_portfolio()
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Make the next request reload the user, so role, password and is_active changes apply at once."""
+    invalidate_user(instance.pk)
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    """Let RequestMetricsMiddleware time the queries of every connection, in any thread."""
+    if timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(timed_execute)
@@ -0,0 +1,633 @@
+"""tests.py"""
+
+import importlib
+import json
+import pickle
+import re
+import threading
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import clear_url_caches, reverse
+from . import urls
+from .cache import user_cache_key
+from .forms import AllocationGridForm
+from .models import EmployeeCapacity, EmployeeResource, Project, ProjectBudget, ProjectComment, User
+from .services import (
+    delete_allocation, import_allocations, roll_forward_allocations, save_allocation, save_allocation_grid
+)
+
+def run_in_threads(count, target):
+    """Run ``target(index)`` in ``count`` threads started together; return what each raised, or None."""
+    barrier = threading.Barrier(count)
+    outcomes = [None] * count
+
+    def worker(index):
+        barrier.wait()
+        try:
+            target(index)
+        except Exception as e:
+            outcomes[index] = e
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+class ProjectDetailsQueryTests(TestCase):
+    """project_details runs the same queries however many resources and comments a budget has."""
+
+    # Session, user, project, budget, resources, first page of comments.
+    QUERIES = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create(username='manager', role='Manager')
+        cls.project = Project.objects.create(name='Busy')
+        cls.budget = ProjectBudget.objects.create(project=cls.project, month='Oct', year='2026', budgeted_resources=Decimal('10'))
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+        self.url = f"{reverse('project_details', kwargs={'project_id': self.project.pk})}?period=Oct 2026"
+        # The first request stores the capabilities in the session.
+        self.client.get(self.url)
+
+    def test_query_count_with_one_resource_and_comment(self):
+        EmployeeResource.objects.create(project_budget=self.budget, employee=self.manager, allocation_ratio=Decimal('0.50'))
+        ProjectComment.objects.create(project_budget=self.budget, user=self.manager, text='Only comment')
+        with self.assertNumQueries(self.QUERIES):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_query_count_with_200_resources_and_500_comments(self):
+        employees = User.objects.bulk_create([User(username=f'employee{index}', role='Employee') for index in range(200)])
+        EmployeeResource.objects.bulk_create([
+            EmployeeResource(project_budget=self.budget, employee=employee, allocation_ratio=Decimal('0.10'))
+            for employee in employees
+        ])
+        ProjectComment.objects.bulk_create([
+            ProjectComment(project_budget=self.budget, user=employees[index % 200], text=f'Comment {index}')
+            for index in range(500)
+        ])
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'employee199')
+
+class ConcurrentAllocationTests(TransactionTestCase):
+    """Parallel writers going through the allocation services, each on its own connection."""
+
+    THREADS = 16
+
+    def setUp(self):
+        self.employee = User.objects.create(username='stressed', role='Employee')
+        self.budgets = [
+            ProjectBudget.objects.create(
+                project=Project.objects.create(name=f'Project {index}'),
+                month='Oct',
+                year='2026',
+                budgeted_resources=Decimal('5')
+            )
+            for index in range(self.THREADS)
+        ]
+
+    def test_parallel_allocations_never_exceed_the_cap(self):
+        def allocate(index):
+            save_allocation(
+                EmployeeResource(project_budget=self.budgets[index], employee=self.employee),
+                Decimal('0.30'),
+                False
+            )
+
+        outcomes = run_in_threads(self.THREADS, allocate)
+
+        refused = [outcome for outcome in outcomes if outcome is not None]
+        self.assertTrue(all(isinstance(outcome, ValidationError) for outcome in refused), refused)
+        total = EmployeeResource.objects.filter(employee=self.employee).aggregate(total=Sum('allocation_ratio'))['total']
+        self.assertEqual(total, Decimal('0.90'))
+        self.assertEqual(len(refused), self.THREADS - 3)
+        self.assertEqual(EmployeeCapacity.allocated_for(self.employee.pk, self.budgets[0].period), total)
+
+    def test_parallel_grid_saves_never_exceed_the_cap(self):
+        def allocate(index):
+            save_allocation_grid(self.budgets[index], {}, [(self.employee, Decimal('0.30'), False)])
+
+        outcomes = run_in_threads(self.THREADS, allocate)
+
+        refused = [outcome for outcome in outcomes if outcome is not None]
+        self.assertTrue(all(isinstance(outcome, ValidationError) for outcome in refused), refused)
+        self.assertEqual(len(refused), self.THREADS - 3)
+        self.assertAllocated(Decimal('0.90'))
+
+    def test_parallel_imports_never_exceed_the_cap(self):
+        reports = [None] * self.THREADS
+
+        def allocate(index):
+            reports[index] = import_allocations([{
+                'project': f'Project {index}',
+                'period': '2026-10',
+                'employee': self.employee.username,
+                'allocation_ratio': '0.30',
+            }])
+
+        self.assertEqual(run_in_threads(self.THREADS, allocate), [None] * self.THREADS)
+        self.assertEqual(sum(report['created'] for report in reports), 3)
+        self.assertAllocated(Decimal('0.90'))
+
+    def test_every_write_path_shares_the_cap(self):
+        # Four projects carry a 0.25 allocation in September, to be rolled forward.
+        for budget in self.budgets[:4]:
+            save_allocation(
+                EmployeeResource(
+                    project_budget=ProjectBudget.objects.create(
+                        project=budget.project, month='Sep', year='2026', budgeted_resources=Decimal('5')
+                    ),
+                    employee=self.employee
+                ),
+                Decimal('0.25'),
+                False
+            )
+        created = [0] * self.THREADS
+
+        def allocate(index):
+            budget = self.budgets[index]
+            path = index % 4
+            if path == 0:
+                created[index] = roll_forward_allocations(budget.period - 1, project=budget.project)['created']
+                return
+            if path == 1:
+                created[index] = import_allocations([{
+                    'project': budget.project.name,
+                    'period': '2026-10',
+                    'employee': self.employee.username,
+                    'allocation_ratio': '0.25',
+                }])['created']
+                return
+            try:
+                if path == 2:
+                    save_allocation_grid(budget, {}, [(self.employee, Decimal('0.25'), False)])
+                else:
+                    save_allocation(EmployeeResource(project_budget=budget, employee=self.employee), Decimal('0.25'), False)
+            except ValidationError:
+                return
+            created[index] = 1
+
+        self.assertEqual(run_in_threads(self.THREADS, allocate), [None] * self.THREADS)
+        self.assertEqual(sum(created), 4)
+        self.assertAllocated(Decimal('1.00'))
+
+    def assertAllocated(self, total):
+        """The employee's October allocations and ledger row both add up to ``total``."""
+        allocations = EmployeeResource.objects.filter(employee=self.employee, project_budget__period=self.budgets[0].period)
+        self.assertEqual(allocations.aggregate(total=Sum('allocation_ratio'))['total'], total)
+        self.assertEqual(EmployeeCapacity.allocated_for(self.employee.pk, self.budgets[0].period), total)
+
+    @skipUnless(connection.vendor == 'sqlite', "SQLite only")
+    def test_parallel_writers_wait_instead_of_failing_under_wal(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+
+        employees = [User.objects.create(username=f'writer{index}', role='Employee') for index in range(self.THREADS)]
+
+        # Each writer books its own employee, through the grid, the import or a single save.
+        def allocate(index):
+            if index % 3 == 0:
+                save_allocation_grid(self.budgets[index], {}, [(employees[index], Decimal('0.50'), False)])
+            elif index % 3 == 1:
+                import_allocations([{
+                    'project': self.budgets[index].project.name,
+                    'period': '2026-10',
+                    'employee': employees[index].username,
+                    'allocation_ratio': '0.50',
+                }])
+            else:
+                save_allocation(
+                    EmployeeResource(project_budget=self.budgets[index], employee=employees[index]),
+                    Decimal('0.50'),
+                    False
+                )
+
+        self.assertEqual(run_in_threads(self.THREADS, allocate), [None] * self.THREADS)
+        self.assertEqual(EmployeeResource.objects.filter(employee__in=employees).count(), self.THREADS)
+
+class BudgetPlanTests(TestCase):
+    """Several months of a project's budgets are saved in one request."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create(username='manager', role='Manager')
+        cls.project = Project.objects.create(name='Planned')
+        ProjectBudget.objects.create(project=cls.project, month='Nov', year='2026', budgeted_resources=Decimal('1'))
+
+    def test_plan_creates_updates_and_copies_forward(self):
+        self.client.force_login(self.manager)
+        url = f"{reverse('budget_plan', kwargs={'project_id': self.project.pk})}?start=2026-10&months=4"
+        start = 2026 * 12 + 10
+        response = self.client.post(url, {
+            f'period_{start}': '2.00',
+            f'period_{start + 1}': '3.00',
+            f'period_{start + 2}': '',
+            f'period_{start + 3}': '',
+            'copy_forward': 'on',
+        })
+        self.assertRedirects(response, reverse('project_details', kwargs={'project_id': self.project.pk}))
+        self.assertEqual(
+            list(self.project.budgets.order_by('period').values_list('month', 'year', 'budgeted_resources')),
+            [
+                ('Oct', '2026', Decimal('2.00')),
+                ('Nov', '2026', Decimal('3.00')),
+                ('Dec', '2026', Decimal('3.00')),
+                ('Jan', '2027', Decimal('3.00')),
+            ]
+        )
+
+    def test_plan_is_refused_to_employees(self):
+        self.client.force_login(User.objects.create(username='employee', role='Employee'))
+        url = reverse('budget_plan', kwargs={'project_id': self.project.pk})
+        self.assertRedirects(self.client.post(url, {}), reverse('dashboard'), fetch_redirect_response=False)
+        self.assertEqual(self.project.budgets.count(), 1)
+
+class SeedDataTests(TestCase):
+    """seed_data only writes into a database that holds no projects, unless forced."""
+
+    def seed(self, **options):
+        call_command(
+            'seed_data', users=20, projects=3, months=2, allocations=30, comments=10, start='2026-01',
+            stdout=StringIO(), **options
+        )
+
+    def test_seeds_an_empty_database(self):
+        self.seed()
+        self.assertEqual(Project.objects.count(), 3)
+        self.assertEqual(ProjectBudget.objects.count(), 6)
+        self.assertEqual(
+            EmployeeCapacity.objects.aggregate(total=Sum('allocated'))['total'],
+            EmployeeResource.objects.aggregate(total=Sum('allocation_ratio'))['total']
+        )
+
+    def test_refuses_a_database_with_projects_unless_forced(self):
+        Project.objects.create(name='Real')
+        with self.assertRaisesMessage(CommandError, 'already holds projects'):
+            self.seed()
+        self.assertEqual(Project.objects.count(), 1)
+        self.seed(force=True)
+        self.assertEqual(Project.objects.count(), 4)
+
+class AsyncViewTests(TestCase):
+    """The async variants render the same pages as the sync views."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create(username='manager', role='Manager')
+        cls.project = Project.objects.create(name='Mirrored')
+        budget = ProjectBudget.objects.create(project=cls.project, month='Oct', year='2026', budgeted_resources=Decimal('2'))
+        save_allocation(EmployeeResource(project_budget=budget, employee=cls.manager), Decimal('0.50'), False)
+        ProjectComment.objects.create(project_budget=budget, user=cls.manager, text='Mirrored comment')
+
+    def route_views(self, async_views):
+        """Rebuild the URLconf with or without the async views."""
+        with override_settings(ASYNC_VIEWS=async_views):
+            importlib.reload(urls)
+        # The root URLconf's include() holds on to the patterns it resolved.
+        importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+        clear_url_caches()
+
+    def render(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return re.sub(r'name="csrfmiddlewaretoken" value="[^"]*"', '', response.content.decode())
+
+    def test_async_views_match_the_sync_views(self):
+        self.client.force_login(self.manager)
+        pages = [
+            reverse('dashboard'),
+            f"{reverse('project_details', kwargs={'project_id': self.project.pk})}?period=Oct 2026",
+            f"{reverse('resource_allocation_overview')}?month=Oct&year=2026",
+            f"{reverse('month_resource_allocation_overview')}?month=Oct&year=2026",
+        ]
+        self.route_views(False)
+        expected = [self.render(url) for url in pages]
+
+        self.addCleanup(self.route_views, False)
+        self.route_views(True)
+        self.assertIsNot(urls.reads, urls.views)
+        self.assertEqual([self.render(url) for url in pages], expected)
+
+class AllocationConflictTests(TestCase):
+    """The single and batch allocation conflict checks."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create(username='manager', role='Manager')
+        cls.employee = User.objects.create(username='busy', role='Employee')
+        cls.budgets = [
+            ProjectBudget.objects.create(
+                project=Project.objects.create(name=f'Project {index}'),
+                month='Oct',
+                year='2026',
+                budgeted_resources=Decimal('5')
+            )
+            for index in range(2)
+        ]
+        save_allocation(EmployeeResource(project_budget=cls.budgets[0], employee=cls.employee), Decimal('0.60'), False)
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+        self.client.get(reverse('dashboard'))
+
+    def check(self, items):
+        return self.client.post(reverse('check_allocation_conflicts'), json.dumps(items), content_type='application/json')
+
+    def test_single_check_takes_the_employee_id(self):
+        url = reverse('check_allocation_conflict', kwargs={'employee_id': self.employee.pk})
+        self.assertEqual(self.client.get(url, {'allocation_ratio': '0.50', 'month': 'Oct', 'year': '2026'}).json(), {'conflict': True})
+        self.assertEqual(self.client.get(url, {'allocation_ratio': '0.40', 'month': 'Oct', 'year': '2026'}).json(), {'conflict': False})
+
+    def test_batch_answers_every_item_with_one_aggregate_query(self):
+        items = [
+            {'employee': self.employee.pk, 'period': '2026-10', 'allocation_ratio': '0.30', 'budget': self.budgets[0].pk},
+            {'employee': self.employee.pk, 'period': '2026-10', 'allocation_ratio': '0.50', 'budget': self.budgets[1].pk},
+            {'employee': self.employee.pk, 'period': '2026-11', 'allocation_ratio': 'intern'},
+        ]
+        # Session and user, then the grouped allocation query.
+        with self.assertNumQueries(3):
+            response = self.check(items)
+        results = response.json()['results']
+        self.assertEqual([result['allocated'] for result in results], ['0.60', '0.60', '0.00'])
+        # 0.30 replaces the 0.60 on the first budget, 0.50 is added on the second.
+        self.assertEqual([result['remaining'] for result in results], ['0.20', '0.20', '1.00'])
+        self.assertEqual([result['conflict'] for result in results], [False, False, False])
+
+        items[1]['allocation_ratio'] = '0.80'
+        results = self.check(items).json()['results']
+        self.assertEqual([result['conflict'] for result in results], [True, True, False])
+
+    def test_batch_rejects_malformed_items(self):
+        self.assertEqual(self.check({'employee': 1}).status_code, 400)
+        self.assertEqual(self.check([{'employee': 'x', 'period': '2026-10', 'allocation_ratio': '0.5'}]).status_code, 400)
+        self.assertEqual(self.check([{'employee': self.employee.pk, 'period': '2026-13', 'allocation_ratio': '0.5'}]).status_code, 400)
+        self.assertEqual(self.client.get(reverse('check_allocation_conflicts')).status_code, 405)
+
+class AllocationGridTests(TestCase):
+    """manage_resources saves every row of a budget's allocation grid at once, or none of them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create(username='manager', role='Manager')
+        cls.employees = [User.objects.create(username=f'employee{index}', role='Employee') for index in range(3)]
+        cls.project = Project.objects.create(name='Grid')
+        cls.budget = ProjectBudget.objects.create(project=cls.project, month='Oct', year='2026', budgeted_resources=Decimal('5'))
+        cls.other = ProjectBudget.objects.create(
+            project=Project.objects.create(name='Other'), month='Oct', year='2026', budgeted_resources=Decimal('5')
+        )
+        cls.kept = save_allocation(EmployeeResource(project_budget=cls.budget, employee=cls.employees[0]), Decimal('0.50'), False)
+        cls.removed = save_allocation(EmployeeResource(project_budget=cls.budget, employee=cls.employees[1]), Decimal('0.50'), False)
+        save_allocation(EmployeeResource(project_budget=cls.other, employee=cls.employees[2]), Decimal('0.70'), False)
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+        self.url = f"{reverse('manage_resources', kwargs={'project_id': self.project.pk})}?period=Oct 2026"
+
+    def post(self, **rows):
+        data = {
+            f'ratio_{self.kept.pk}': '0.50',
+            f'ratio_{self.removed.pk}': '0.50',
+        }
+        data.update(rows)
+        return self.client.post(self.url, data)
+
+    def allocations(self):
+        return dict(self.budget.employee_resources.values_list('employee__username', 'allocation_ratio'))
+
+    def test_updates_deletes_and_additions_are_saved_together(self):
+        response = self.post(**{
+            f'ratio_{self.kept.pk}': '0.80',
+            f'delete_{self.removed.pk}': 'on',
+            'new_employee_0': 'employee2',
+            'new_ratio_0': '0.30',
+            'new_employee_3': 'manager',
+            'new_ratio_3': 'intern',
+        })
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        self.assertEqual(
+            self.allocations(),
+            {'employee0': Decimal('0.80'), 'employee2': Decimal('0.30'), 'manager': Decimal('0.00')}
+        )
+        self.assertEqual(EmployeeCapacity.allocated_for(self.employees[1].pk, self.budget.period), Decimal('0.00'))
+
+    def test_one_employee_over_the_cap_rolls_back_every_row(self):
+        response = self.post(**{
+            f'ratio_{self.kept.pk}': '0.80',
+            'new_employee_0': 'employee2',
+            'new_ratio_0': '0.40',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'employee2')
+        self.assertEqual(self.allocations(), {'employee0': Decimal('0.50'), 'employee1': Decimal('0.50')})
+
+    def test_rows_past_the_limit_are_refused_not_dropped(self):
+        limit = AllocationGridForm.MAX_NEW_ROWS
+        response = self.post(**{f'new_employee_{limit}': 'employee2', f'new_ratio_{limit}': '0.10'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f"At most {limit} new resources can be added at once.")
+        self.assertNotIn('employee2', self.allocations())
+
+class CapacityLedgerTests(TestCase):
+    """Single saves and bulk writes leave the capacity ledger in the same shape."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create(username='ledgered', role='Employee')
+        cls.budget = ProjectBudget.objects.create(
+            project=Project.objects.create(name='Ledgered'), month='Oct', year='2026', budgeted_resources=Decimal('2')
+        )
+
+    def ledger(self):
+        return list(EmployeeCapacity.objects.filter(employee=self.employee).values_list('period', 'allocated'))
+
+    def test_single_saves_keep_no_empty_rows(self):
+        resource = save_allocation(EmployeeResource(project_budget=self.budget, employee=self.employee), Decimal('0.50'), False)
+        self.assertEqual(self.ledger(), [(self.budget.period, Decimal('0.50'))])
+        save_allocation(resource, Decimal('0'), True)
+        self.assertEqual(self.ledger(), [])
+        delete_allocation(resource)
+        self.assertEqual(self.ledger(), [])
+
+    def test_bulk_writes_keep_no_empty_rows(self):
+        resource = save_allocation(EmployeeResource(project_budget=self.budget, employee=self.employee), Decimal('0.50'), False)
+        save_allocation_grid(self.budget, {resource.pk: (Decimal('0'), True)}, [])
+        self.assertEqual(self.ledger(), [])
+        save_allocation_grid(self.budget, {resource.pk: (Decimal('0.40'), False)}, [])
+        self.assertEqual(self.ledger(), [(self.budget.period, Decimal('0.40'))])
+        save_allocation_grid(self.budget, {resource.pk: None}, [])
+        self.assertEqual(self.ledger(), [])
+
+    def test_reassigned_allocation_counts_in_full_for_the_new_employee(self):
+        resource = save_allocation(EmployeeResource(project_budget=self.budget, employee=self.employee), Decimal('0.50'), False)
+        other = User.objects.create(username='busier', role='Employee')
+        save_allocation(
+            EmployeeResource(
+                project_budget=ProjectBudget.objects.create(
+                    project=Project.objects.create(name='Busier'), month='Oct', year='2026', budgeted_resources=Decimal('2')
+                ),
+                employee=other
+            ),
+            Decimal('0.60'),
+            False
+        )
+        resource.employee = other
+        with self.assertRaises(ValidationError):
+            save_allocation(resource, Decimal('0.50'), False)
+        self.assertEqual(EmployeeCapacity.allocated_for(other.pk, self.budget.period), Decimal('0.60'))
+
+class AllocationImportTests(TestCase):
+    """CSV rows are checked against the same rules as the allocation grid, and rejected ones leave no trace."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(name='Imported')
+        cls.budget = ProjectBudget.objects.create(project=cls.project, month='Oct', year='2026', budgeted_resources=Decimal('2'))
+        User.objects.create(username='active', role='Employee')
+        User.objects.create(username='departed', role='Employee', is_active=False)
+
+    def test_inactive_employees_are_reported_not_assigned(self):
+        report = import_allocations([
+            {'project': 'Imported', 'period': 'Oct 2026', 'employee': 'active', 'allocation_ratio': '0.50'},
+            {'project': 'Imported', 'period': '2026-10', 'employee': 'departed', 'allocation_ratio': '0.50'},
+        ])
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['errors'], [{'line': 3, 'error': "Unknown or inactive employee departed."}])
+        self.assertEqual(list(self.budget.employee_resources.values_list('employee__username', flat=True)), ['active'])
+
+    def test_rejected_rows_leave_no_ledger_rows(self):
+        report = import_allocations([
+            {'project': 'Imported', 'period': 'Nov 2026', 'employee': 'active', 'allocation_ratio': '0.50'},
+            {'project': 'Imported', 'period': 'Oct 2026', 'employee': 'active', 'allocation_ratio': '0.50'},
+            {'project': 'Imported', 'period': 'Oct 2026', 'employee': 'active', 'allocation_ratio': '0.30'},
+        ])
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(len(report['errors']), 2)
+        self.assertEqual(
+            list(EmployeeCapacity.objects.values_list('employee__username', 'period', 'allocated')),
+            [('active', self.budget.period, Decimal('0.50'))]
+        )
+
+    def test_skipped_roll_forward_leaves_no_ledger_rows(self):
+        save_allocation(
+            EmployeeResource(project_budget=self.budget, employee=User.objects.get(username='active')),
+            Decimal('0.50'),
+            False
+        )
+        report = roll_forward_allocations(self.budget.period)
+        self.assertEqual(report['created'], 0)
+        self.assertEqual(report['skipped'], ["No budget for Imported in Nov 2026."])
+        self.assertEqual(list(EmployeeCapacity.objects.values_list('period', flat=True)), [self.budget.period])
+
+    def test_roll_forward_reports_inactive_employees(self):
+        EmployeeResource.objects.create(project_budget=self.budget, employee=User.objects.get(username='active'), allocation_ratio=Decimal('0.50'))
+        EmployeeResource.objects.create(project_budget=self.budget, employee=User.objects.get(username='departed'), allocation_ratio=Decimal('0.50'))
+        ProjectBudget.objects.create(project=self.project, month='Nov', year='2026', budgeted_resources=Decimal('2'))
+        report = roll_forward_allocations(self.budget.period)
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['existing'], 0)
+        self.assertEqual(report['skipped'], ["Skipped departed in Imported: employee inactive."])
+        self.assertEqual(EmployeeCapacity.objects.filter(period=self.budget.period + 1).count(), 1)
+
+class CapabilityRoutingTests(TestCase):
+    """Dashboards and comment moderation are decided by capabilities, not role names."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lead = User.objects.create(username='lead', role='Team Lead')
+        cls.author = User.objects.create(username='author', role='Employee')
+        cls.other = User.objects.create(username='other', role='Employee')
+        budget = ProjectBudget.objects.create(
+            project=Project.objects.create(name='Moderated'), month='Oct', year='2026', budgeted_resources=Decimal('1')
+        )
+        cls.comment = ProjectComment.objects.create(project_budget=budget, user=cls.author, text='Original')
+
+    def edit(self, user, text):
+        self.client.force_login(user)
+        return self.client.post(
+            f"{reverse('edit_comment', args=[self.comment.pk])}?period=Oct 2026", {'comment_text': text}
+        )
+
+    def test_dashboard_follows_the_capabilities(self):
+        for user, template in [(self.lead, 'team_lead_dashboard.html'), (self.author, 'employee_dashboard.html')]:
+            self.client.force_login(user)
+            self.assertTemplateUsed(self.client.get(reverse('dashboard')), template)
+
+        # An employee granted a team lead capability gets the team lead dashboard.
+        session = self.client.session
+        session['_capabilities'] = {'user': self.author.pk, 'role': 'Employee', 'capabilities': ['manage_employees']}
+        session.save()
+        self.assertTemplateUsed(self.client.get(reverse('dashboard')), 'team_lead_dashboard.html')
+
+    def test_only_the_author_or_a_moderator_can_edit_a_comment(self):
+        self.assertRedirects(self.edit(self.other, 'Hijacked'), reverse('dashboard'), fetch_redirect_response=False)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.text, 'Original')
+
+        self.edit(self.author, 'By the author')
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.text, 'By the author')
+
+        self.edit(self.lead, 'By the lead')
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.text, 'By the lead')
+
+    def test_only_the_author_or_a_moderator_can_delete_a_comment(self):
+        url = f"{reverse('delete_comment', args=[self.comment.pk])}?period=Oct 2026"
+        self.client.force_login(self.other)
+        self.client.post(url)
+        self.assertTrue(ProjectComment.objects.filter(pk=self.comment.pk).exists())
+
+        self.client.force_login(self.lead)
+        self.client.post(url)
+        self.assertFalse(ProjectComment.objects.filter(pk=self.comment.pk).exists())
+
+@override_settings(AUTH_USER_CACHE_TIMEOUT=300)
+class UserCacheTests(TestCase):
+    """The logged-in user is cached without their password hash and dropped when saved."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='cached', password='first-secret', role='Employee')
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client.force_login(self.user)
+
+    def test_cached_user_leaves_the_password_out(self):
+        self.client.get(reverse('dashboard'))
+        # What the file cache writes to disk.
+        pickled = pickle.dumps(cache.get(user_cache_key(self.user.pk)))
+        self.assertNotIn(self.user.password.encode(), pickled)
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        user = response.wsgi_request.user
+        self.assertEqual((user.pk, user.username, user.role), (self.user.pk, 'cached', 'Employee'))
+        self.assertEqual(user.get_deferred_fields(), {'password', 'last_login', 'email', 'date_joined'})
+
+    def test_password_change_logs_the_session_out(self):
+        self.client.get(reverse('dashboard'))
+        self.user.set_password('second-secret')
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertRedirects(
+            self.client.get(reverse('dashboard')), f"{settings.LOGIN_URL}?next={reverse('dashboard')}",
+            fetch_redirect_response=False
+        )
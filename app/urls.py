@@ -1,47 +1,72 @@
 """Urls.py"""
 
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import api, async_views, views
+from .decorators import requires
+from .permissions import owns_comment
+
+# The read-heavy views have async variants for ASGI deployments.
+reads = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('', views.user_login, name='login'),
     path('register/', views.register, name='register'),
     path('login/', views.user_login, name='login'),
-    path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/', reads.dashboard, name='dashboard'),
     path('logout/', views.user_logout, name='logout'),
     path('password_reset/', auth_views.PasswordResetView.as_view(template_name='password_reset.html'), name='password_reset'),
     path('password_reset/done/', auth_views.PasswordResetDoneView.as_view(template_name='password_reset_done.html'), name='password_reset_done'),
     path('reset/<uidb64>/<token>/', auth_views.PasswordResetConfirmView.as_view(template_name='password_reset_confirm.html'), name='password_reset_confirm'),
     
     path('reset/done/', auth_views.PasswordResetCompleteView.as_view(template_name='password_reset_complete.html'), name='password_reset_complete'),
-    path('manager_dashboard/', views.dashboard, name='manager_dashboard'),
+    path('manager_dashboard/', reads.dashboard, name='manager_dashboard'),
 
     path('project/<int:project_id>/add_comment/', views.add_comment, name='add_comment'),
-    path('comment/<int:comment_id>/edit/', views.edit_comment, name='edit_comment'),
-    path('comment/<int:comment_id>/delete/', views.delete_comment, name='delete_comment'),
+    path('budget/<int:budget_id>/comments/', views.project_comments, name='project_comments'),
+    path('comment/<int:comment_id>/edit/', requires('moderate_comments', views.edit_comment, owner=owns_comment), name='edit_comment'),
+    path('comment/<int:comment_id>/delete/', requires('moderate_comments', views.delete_comment, owner=owns_comment), name='delete_comment'),
     
-    path('dashboard/team_lead/', views.team_lead_dashboard, name='team_lead_dashboard'),
-    path('dashboard/employee/', views.employee_dashboard, name='employee_dashboard'),
-
-    path('dashboard/project/create/', views.create_project, name='create_project'),
-    path('project/<int:project_id>/', views.project_details, name='project_details'),
-    path('project/<int:project_id>/edit/', views.edit_project, name='edit_project'),
-    path('project/<int:project_id>/delete/', views.delete_project, name='delete_project'),
-    path('project/<int:project_id>/edit_budgeted_resources/', views.edit_budgeted_resources, name='edit_budgeted_resources'),
+    path('dashboard/team_lead/', reads.team_lead_dashboard, name='team_lead_dashboard'),
+    path('dashboard/employee/', reads.employee_dashboard, name='employee_dashboard'),
+    path('dashboard/cache_stats/', requires('view_metrics', views.dashboard_cache_stats, json=True), name='dashboard_cache_stats'),
+    path('dashboard/metrics/', requires('view_metrics', views.request_metrics_data, json=True), name='request_metrics'),
+    path('portfolio/', requires('view_portfolio', views.portfolio), name='portfolio'),
+    path('portfolio/data/', requires('view_portfolio', views.portfolio_data, json=True), name='portfolio_data'),
+    path('utilization/', requires('view_utilization', views.utilization_heatmap), name='utilization_heatmap'),
+    path('utilization/data/', requires('view_utilization', views.utilization_data, json=True), name='utilization_data'),
+
+    path('dashboard/project/create/', requires('manage_projects', views.create_project), name='create_project'),
+    path('project/<int:project_id>/', reads.project_details, name='project_details'),
+    path('project/<int:project_id>/edit/', requires('manage_projects', views.edit_project), name='edit_project'),
+    path('project/<int:project_id>/delete/', requires('manage_projects', views.delete_project), name='delete_project'),
+    path('project/<int:project_id>/edit_budgeted_resources/', requires('manage_budgets', views.edit_budgeted_resources), name='edit_budgeted_resources'),
+    path('project/<int:project_id>/budget_plan/', requires('manage_budgets', views.budget_plan), name='budget_plan'),
     
-    path('project/<int:project_id>/manage_resources/', views.manage_resources, name='manage_resources'),
-    path('resource/<int:resource_id>/edit/', views.edit_employee_resource, name='edit_employee_resource'),
-    path('resource/<int:resource_id>/delete/', views.delete_employee_resource, name='delete_employee_resource'),
-    path('resource/<int:resource_id>/check_allocation_conflict/', views.check_allocation_conflict, name='check_allocation_conflict'),
-    path('resources/overview/', views.resource_allocation_overview, name='resource_allocation_overview'),
-    path('project/<int:project_id>/add_employee_resource/', views.add_employee_resource, name='add_employee_resource'),
-
-    path('manager_dashboard/add_employee/', views.add_employee, name='add_employee'),
-
-    path('employee_overview/', views.employee_overview, name='employee_overview'),
-    path('employee/<int:employee_id>/edit/', views.edit_employee, name='edit_employee'),
-    path('employee/<int:employee_id>/delete/', views.delete_employee, name='delete_employee'),
-    path('month_resource_allocation/', views.month_resource_allocation_overview, name='month_resource_allocation_overview'),
-    path('employee_management/', views.employee_management, name='employee_management'),
+    path('project/<int:project_id>/manage_resources/', requires('manage_resources', views.manage_resources), name='manage_resources'),
+    path('resource/<int:resource_id>/edit/', requires('manage_resources', views.edit_employee_resource), name='edit_employee_resource'),
+    path('resource/<int:resource_id>/delete/', requires('manage_resources', views.delete_employee_resource), name='delete_employee_resource'),
+    path('employee/<int:employee_id>/check_allocation_conflict/', requires('manage_resources', reads.check_allocation_conflict, json=True), name='check_allocation_conflict'),
+    path('resources/check_allocation_conflicts/', requires('manage_resources', views.check_allocation_conflicts, json=True), name='check_allocation_conflicts'),
+    path('resources/overview/', requires('view_resources', reads.resource_allocation_overview), name='resource_allocation_overview'),
+    path('resources/overview/export/', requires('view_resources', views.resource_allocation_export), name='resource_allocation_export'),
+    path('resources/import/', requires('manage_resources', views.allocation_import), name='allocation_import'),
+    path('resources/roll_forward/', requires('manage_resources', views.roll_forward), name='roll_forward'),
+    path('project/<int:project_id>/add_employee_resource/', requires('manage_resources', views.add_employee_resource), name='add_employee_resource'),
+
+    path('manager_dashboard/add_employee/', requires('manage_employees', views.add_employee), name='add_employee'),
+
+    path('employee_overview/', requires('manage_employees', views.employee_overview), name='employee_overview'),
+    path('employees/autocomplete/', requires('manage_resources', views.employee_autocomplete, json=True), name='employee_autocomplete'),
+    path('employee/<int:employee_id>/edit/', requires('manage_employees', views.edit_employee), name='edit_employee'),
+    path('employee/<int:employee_id>/delete/', requires('manage_employees', views.delete_employee), name='delete_employee'),
+    path('month_resource_allocation/', requires('view_resources', reads.month_resource_allocation_overview), name='month_resource_allocation_overview'),
+    path('month_resource_allocation/export/', requires('view_resources', views.month_resource_allocation_export), name='month_resource_allocation_export'),
+    path('employee_management/', requires('manage_employees', views.employee_management), name='employee_management'),
+
+    path('api/v1/projects/', requires('view_resources', api.api_list, json=True), {'resource': 'projects'}, name='api_projects'),
+    path('api/v1/budgets/', requires('view_resources', api.api_list, json=True), {'resource': 'budgets'}, name='api_budgets'),
+    path('api/v1/allocations/', requires('view_resources', api.api_list, json=True), {'resource': 'allocations'}, name='api_allocations'),
+    path('api/v1/comments/', requires('view_resources', api.api_list, json=True), {'resource': 'comments'}, name='api_comments'),
 ]
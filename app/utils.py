@@ -0,0 +1,69 @@
+"""utils.py"""
+
+import calendar
+from decimal import Decimal, InvalidOperation
+
+INTERN_LABELS = ('intern', 'interns')
+
+def parse_allocation_ratio(value):
+    """Parse a submitted allocation ratio into a ``(ratio, is_intern)`` tuple.
+
+    Interns carry no allocation, so they are returned as ``(Decimal('0.00'), True)``.
+    Raises ValueError when the value is neither a number nor 'intern'.
+    """
+    text = str(value).strip().lower()
+    if text in INTERN_LABELS:
+        return Decimal('0.00'), True
+
+    try:
+        ratio = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Invalid allocation ratio: {value!r}")
+
+    if not ratio.is_finite():
+        raise ValueError(f"Invalid allocation ratio: {value!r}")
+
+    return ratio.quantize(Decimal('0.01')), False
+
+def period_key(month, year):
+    """Return the integer period key (``year * 12 + month``) for a month abbreviation and year.
+
+    Raises ValueError when the month or year cannot be parsed.
+    """
+    try:
+        month_idx = list(calendar.month_abbr).index(month)
+    except ValueError:
+        raise ValueError(f"Invalid month: {month!r}")
+    if month_idx == 0:
+        raise ValueError(f"Invalid month: {month!r}")
+    try:
+        return int(year) * 12 + month_idx
+    except TypeError:
+        raise ValueError(f"Invalid year: {year!r}")
+
+def parse_period(period):
+    """Return the period key for a period label such as 'Oct 2026'."""
+    month, year = period.split()
+    return period_key(month, year)
+
+def period_from_key(key):
+    """Return the ``(month, year)`` strings stored on ProjectBudget for a period key."""
+    year, month_idx = divmod(key - 1, 12)
+    return calendar.month_abbr[month_idx + 1], str(year)
+
+def period_label(key):
+    """Return the 'Mon YYYY' label for a period key."""
+    return "%s %s" % period_from_key(key)
+
+def month_input_key(value):
+    """Return the period key for an HTML month input value such as '2026-10'."""
+    year, month = value.split('-')
+    month = int(month)
+    if not 1 <= month <= 12:
+        raise ValueError(f"Invalid month: {value!r}")
+    return int(year) * 12 + month
+
+def month_input_value(key):
+    """Return the HTML month input value ('YYYY-MM') for a period key."""
+    year, month_idx = divmod(key - 1, 12)
+    return f"{year:04d}-{month_idx + 1:02d}"
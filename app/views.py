@@ -2,20 +2,38 @@
 
 from datetime import datetime
 import calendar
-from decimal import Decimal, InvalidOperation
+import io
+import json
+from decimal import Decimal
 from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse
-from django.http import HttpResponseRedirect, JsonResponse
+from django.http import HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.utils.http import urlencode
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
 from django.db import IntegrityError
-from django.db.models import Sum
-from .forms import CustomUserCreationForm, EmployeeForm, ProjectForm, ProjectBudgetForm  
-from .models import Project, ProjectBudget, ProjectComment, EmployeeResource
+from django.db.models import Exists, Min, OuterRef, Prefetch, Sum
+from .forms import AllocationGridForm, AllocationImportForm, BudgetPlanForm, CustomUserCreationForm, EmployeeForm, ProjectForm, ProjectBudgetForm  
+from .cache import cache_stats, cached_portfolio_summary, cached_utilization_matrix, dashboard_projects
+from .middleware import request_metrics
+from .permissions import dashboard_for
+from .models import Project, ProjectBudget, ProjectComment, EmployeeResource, EmployeeCapacity
+from .reports import (
+    ALLOCATION_EXPORT_HEADER, BUDGET_EXPORT_HEADER, allocation_export_rows, allocation_overview, budget_export_rows,
+    comments_page, matrix_row, stream_csv
+)
+from .services import (
+    check_allocations, delete_allocation, import_allocations, read_allocation_csv, roll_forward_allocations,
+    save_allocation, save_allocation_grid, save_budget_plan
+)
+from .utils import (
+    month_input_key, month_input_value, parse_allocation_ratio, parse_period, period_key, period_label
+)
 
 User = get_user_model()
 
@@ -54,19 +72,127 @@ def user_logout(request):
     logout(request)
     return redirect('login')
 
+DASHBOARD_TEMPLATES = {
+    'Manager': 'manager_dashboard.html',
+    'Team Lead': 'team_lead_dashboard.html',
+    'Employee': 'employee_dashboard.html',
+}
+
 @login_required
 def dashboard(request):
-    """Render the dashboard based on the user's role."""
-    projects = Project.objects.all()
-    
-    if request.user.role == 'Manager':
-        return render(request, 'manager_dashboard.html', {'projects': projects})
-    elif request.user.role == 'Team Lead':
-        return render(request, 'team_lead_dashboard.html', {'projects': projects})
-    elif request.user.role == 'Employee':
-        return render(request, 'employee_dashboard.html', {'projects': projects})
-    else:
-        return redirect('login')
+    """Render the dashboard based on the user's capabilities."""
+    name = dashboard_for(request)
+    return render(request, DASHBOARD_TEMPLATES[name], {'projects_html': dashboard_projects(name)})
+
+@login_required
+def dashboard_cache_stats(request):
+    """Report the dashboard cache hit and miss counters to managers."""
+    return JsonResponse(cache_stats())
+
+@login_required
+def request_metrics_data(request):
+    """Report the per-view latency and query metrics of this process to managers."""
+    return JsonResponse({'views': request_metrics()})
+
+def _portfolio_range(request, months=6):
+    """Period range selected on the portfolio page; defaults to six months from the current month."""
+    now = datetime.now()
+    current_period = now.year * 12 + now.month
+    try:
+        start_period = month_input_key(request.GET.get('start', ''))
+    except ValueError:
+        start_period = current_period
+    try:
+        end_period = month_input_key(request.GET.get('end', ''))
+    except ValueError:
+        end_period = start_period + months - 1
+    return min(start_period, end_period), max(start_period, end_period)
+
+HEATMAP_MAX_MONTHS = 36
+
+def _heatmap_filters(request):
+    """Period range (twelve months by default, at most HEATMAP_MAX_MONTHS) and project of the heatmap."""
+    start_period, end_period = _portfolio_range(request, months=12)
+    end_period = min(end_period, start_period + HEATMAP_MAX_MONTHS - 1)
+    try:
+        project_id = int(request.GET['project']) if request.GET.get('project') else None
+    except ValueError:
+        project_id = None
+    return start_period, end_period, project_id
+
+@login_required
+def utilization_heatmap(request):
+    """View to display each employee's allocation across a range of months."""
+    start_period, end_period, project_id = _heatmap_filters(request)
+    matrix = cached_utilization_matrix(start_period, end_period, project_id)
+
+    page = Paginator(range(len(matrix['employees'])), 100).get_page(request.GET.get('page'))
+    rows = [
+        {
+            'employee_id': matrix['employees'][index][0],
+            'username': matrix['employees'][index][1],
+            'cells': matrix_row(matrix, index),
+        }
+        for index in page.object_list
+    ]
+
+    params = request.GET.copy()
+    params.pop('page', None)
+    return render(request, 'utilization_heatmap.html', {
+        'page': page,
+        'rows': rows,
+        'periods': [period_label(period) for period in matrix['periods']],
+        'start': month_input_value(start_period),
+        'end': month_input_value(end_period),
+        'selected_project': project_id,
+        'available_projects': Project.objects.order_by('name'),
+        'filter_query': params.urlencode(),
+    })
+
+@login_required
+def utilization_data(request):
+    """JSON variant of the utilization heatmap, with the full dense matrix."""
+
+    start_period, end_period, project_id = _heatmap_filters(request)
+    matrix = cached_utilization_matrix(start_period, end_period, project_id)
+    return JsonResponse({
+        'periods': [month_input_value(period) for period in matrix['periods']],
+        'employees': [{'id': employee_id, 'username': username} for employee_id, username in matrix['employees']],
+        'matrix': [matrix_row(matrix, index).tolist() for index in range(len(matrix['employees']))],
+    })
+
+@login_required
+def portfolio(request):
+    """View to display budgeted vs actual resources for every project across a range of periods."""
+    start_period, end_period = _portfolio_range(request)
+    projects = cached_portfolio_summary(start_period, end_period)
+
+    budgeted_total = sum((project['budgeted'] for project in projects), Decimal('0'))
+    actual_total = sum((project['actual'] for project in projects), Decimal('0'))
+    profit_total = budgeted_total - actual_total
+
+    return render(request, 'portfolio.html', {
+        'projects': projects,
+        'start': month_input_value(start_period),
+        'end': month_input_value(end_period),
+        'start_label': period_label(start_period),
+        'end_label': period_label(end_period),
+        'budgeted_total': budgeted_total,
+        'actual_total': actual_total,
+        'profit_total': profit_total,
+        'profit_percentage_total': profit_total / budgeted_total * 100 if budgeted_total else None,
+    })
+
+@login_required
+def portfolio_data(request):
+    """JSON variant of the portfolio view."""
+
+    start_period, end_period = _portfolio_range(request)
+    return JsonResponse({
+        'start': month_input_value(start_period),
+        'end': month_input_value(end_period),
+        'projects': cached_portfolio_summary(start_period, end_period),
+    })
 
 @login_required
 def create_project(request):
@@ -94,45 +220,36 @@ def create_project(request):
 @login_required
 def project_details(request, project_id):
     """View to display the details of a specific project and allow filtering by period."""
-    project = get_object_or_404(Project, pk=project_id)
-    start_month = project.budgets.first().month
-    start_year = project.budgets.first().year
-
-    start_month_idx = list(calendar.month_abbr).index(start_month)
-    start_year = int(start_year)
+    project = get_object_or_404(Project.objects.annotate(start_period=Min('budgets__period')), pk=project_id)
 
-    available_periods = []
-    for i in range(6):
-        next_month = (start_month_idx + i - 1) % 12 + 1
-        next_year = start_year + ((start_month_idx + i - 1) // 12)
-        available_periods.append(f"{calendar.month_abbr[next_month]} {next_year}")
+    available_periods = [period_label(project.start_period + i) for i in range(6)] if project.start_period else []
 
-    selected_period = request.GET.get('period', available_periods[0])  # Default to the first period if none is selected
+    selected_period = request.GET.get('period', available_periods[0] if available_periods else None)  # Default to the first period if none is selected
 
     try:
-        month, year = selected_period.split()
-    except ValueError:
-        month, year = None, None
+        budget_period = parse_period(selected_period)
+    except (ValueError, AttributeError):
+        budget_period = None
 
-    budget = ProjectBudget.objects.filter(project=project, month=month, year=year).first()
+    # One query for the budget and its stored P&L summary, one prefetch for
+    # the resources and one for the first page of comments, with their users
+    # joined in; older comments are loaded on demand from project_comments.
+    budget = ProjectBudget.objects.filter(project=project, period=budget_period).prefetch_related(
+        Prefetch(
+            'employee_resources',
+            queryset=EmployeeResource.objects.select_related('employee'),
+            to_attr='resources'
+        ),
+    ).first() if budget_period else None
 
-    recent_comments = ProjectComment.objects.filter(project_budget=budget).order_by('-created_at') if budget else None
+    recent_comments, next_cursor = comments_page(budget.id) if budget else (None, None)
 
-    employee_resources = EmployeeResource.objects.filter(project_budget=budget) if budget else []
+    employee_resources = budget.resources if budget else []
 
-    actual_resources = Decimal(
-        sum(
-            float(resource.allocation_ratio) 
-            for resource in employee_resources 
-            if isinstance(resource.allocation_ratio, (int, float)) or 
-            resource.allocation_ratio.lower() not in ['intern', 'interns']
-        )
-    )
+    actual_resources = (budget.actual_resources if budget else None) or Decimal('0')
 
-    profit_rating = Decimal(budget.budgeted_resources) - actual_resources if budget else None
-    profit_loss_percentage = (
-        (profit_rating / Decimal(budget.budgeted_resources)) * 100 if budget and budget.budgeted_resources != 0 else None
-    )
+    profit_rating = budget.profit_rating if budget else None
+    profit_loss_percentage = budget.profit_loss_percentage if budget else None
 
     if request.method == 'POST' and 'comment_text' in request.POST:
         comment_text = request.POST['comment_text']
@@ -150,12 +267,43 @@ def project_details(request, project_id):
         'available_periods': available_periods,
         'selected_period': selected_period,
         'recent_comments': recent_comments,
+        'next_cursor': next_cursor,
         'employee_resources': employee_resources,
         'actual_resources': actual_resources,
         'profit_rating': profit_rating,
         'profit_loss_percentage': profit_loss_percentage,
     })
 
+@login_required
+def project_comments(request, budget_id):
+    """Next page of a budget's comments, as an HTML fragment or, with ?format=json, as JSON."""
+    budget = get_object_or_404(ProjectBudget, pk=budget_id)
+    try:
+        comments, next_cursor = comments_page(budget.id, request.GET.get('cursor'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'user': comment.user.username if comment.user else None,
+                    'text': comment.text,
+                    'created_at': comment.created_at,
+                }
+                for comment in comments
+            ],
+            'next_cursor': next_cursor,
+        })
+
+    return render(request, 'project_comments.html', {
+        'budget': budget,
+        'comments': comments,
+        'next_cursor': next_cursor,
+        'selected_period': period_label(budget.period),
+    })
+
 @login_required
 def edit_project(request, project_id):
     """Handle project editing by the manager.
@@ -182,11 +330,8 @@ def delete_project(request, project_id):
     """View to delete a specific project."""
     project = get_object_or_404(Project, pk=project_id)
 
-    if request.user.role == 'Manager':
-        project.delete()
-        return redirect('manager_dashboard')
-
-    return redirect('project_details', project_id=project.id)
+    project.delete()
+    return redirect('manager_dashboard')
 
 @login_required
 def add_comment(request, project_id):
@@ -198,12 +343,12 @@ def add_comment(request, project_id):
         comment_text = request.POST.get('comment_text')
         if comment_text and period:
             try:
-                month, year = period.split()
+                budget_period = parse_period(period)
             except ValueError:
                 messages.error(request, "Invalid period format.")
                 return redirect('project_details', project_id=project.id)
 
-            budget = ProjectBudget.objects.filter(project=project, month=month, year=year).first()
+            budget = ProjectBudget.objects.filter(project=project, period=budget_period).first()
             if budget:
                 ProjectComment.objects.create(
                     project_budget=budget,
@@ -250,8 +395,6 @@ def edit_budgeted_resources(request, project_id):
     """Handle editing the budgeted resources for a specific month and year of a project."""
     project = get_object_or_404(Project, pk=project_id)
     period = request.GET.get('period')
-    if request.user.role != 'Manager':
-        return redirect('project_details', project_id=project.id)
 
     if not period:
         messages.error(request, "No period selected.")
@@ -259,11 +402,12 @@ def edit_budgeted_resources(request, project_id):
 
     try:
         month, year = period.split()
+        budget_period = period_key(month, year)
     except ValueError:
         messages.error(request, "Invalid period format. Please try again.")
         return redirect('project_details', project_id=project.id)
 
-    budget = ProjectBudget.objects.filter(project=project, month=month, year=year).first()
+    budget = ProjectBudget.objects.filter(project=project, period=budget_period).first()
 
     if request.method == 'POST':
         try:
@@ -290,23 +434,59 @@ def edit_budgeted_resources(request, project_id):
         'error_message': error_message,
     })
 
+@login_required
+def budget_plan(request, project_id):
+    """Create or update the budgeted resources of several consecutive periods of a project at once."""
+    project = get_object_or_404(Project.objects.annotate(start_period=Min('budgets__period')), pk=project_id)
+
+    now = datetime.now()
+    try:
+        start_period = month_input_key(request.GET.get('start', ''))
+    except ValueError:
+        start_period = project.start_period or now.year * 12 + now.month
+    try:
+        months = min(max(int(request.GET.get('months', 6)), 1), 12)
+    except ValueError:
+        months = 6
+    periods = list(range(start_period, start_period + months))
+
+    if request.method == 'POST':
+        form = BudgetPlanForm(request.POST, periods=periods)
+        if form.is_valid():
+            created, updated = save_budget_plan(project, form.budgets_by_period(), form.cleaned_data['copy_forward'])
+            messages.success(request, f"Budget plan saved: {created} months created, {updated} updated.")
+            return redirect('project_details', project_id=project.id)
+        messages.error(request, "Please correct the errors below.")
+    else:
+        existing = dict(project.budgets.filter(period__in=periods).values_list('period', 'budgeted_resources'))
+        form = BudgetPlanForm(
+            periods=periods,
+            initial={f'period_{period}': value for period, value in existing.items()}
+        )
+
+    return render(request, 'budget_plan.html', {
+        'project': project,
+        'form': form,
+        'start': month_input_value(start_period),
+        'months': months,
+        'month_choices': range(1, 13),
+    })
+
 @login_required
 def team_lead_dashboard(request):
     """View to render the dashboard for Team Leads."""
-    if request.user.role != 'Team Lead':
+    if dashboard_for(request) != 'Team Lead':
         return redirect('dashboard')
 
-    projects = Project.objects.all()
-    return render(request, 'team_lead_dashboard.html', {'projects': projects})
+    return render(request, 'team_lead_dashboard.html', {'projects_html': dashboard_projects('Team Lead')})
 
 @login_required
 def employee_dashboard(request):
     """View to render the dashboard for Employees."""
-    if request.user.role != 'Employee':
+    if dashboard_for(request) != 'Employee':
         return redirect('dashboard')
 
-    projects = Project.objects.all()
-    return render(request, 'employee_dashboard.html', {'projects': projects})
+    return render(request, 'employee_dashboard.html', {'projects_html': dashboard_projects('Employee')})
 
 @login_required
 def manage_resources(request, project_id):
@@ -318,44 +498,49 @@ def manage_resources(request, project_id):
         messages.error(request, "Period is required to manage resources.")
         return redirect('project_details', project_id=project.id)
 
-    month, year = selected_period.split()
-    project_budget = ProjectBudget.objects.filter(project=project, month=month, year=year).first()
+    try:
+        budget_period = parse_period(selected_period)
+    except ValueError:
+        messages.error(request, "Invalid period format.")
+        return redirect('project_details', project_id=project.id)
+
+    project_budget = ProjectBudget.objects.filter(project=project, period=budget_period).first()
 
     if not project_budget:
         messages.error(request, f"No budget allocated for {selected_period}. Please allocate budget first.")
         return redirect('project_details', project_id=project.id)
 
+    resources = EmployeeResource.objects.filter(project_budget=project_budget).select_related('employee').order_by(
+        'employee__username'
+    )
     if request.method == 'POST':
-        employee_id = request.POST.get('employee_id')
-        allocation_ratio = request.POST.get('allocation_ratio')
-
-        if employee_id and allocation_ratio:
+        form = AllocationGridForm(request.POST, resources=resources)
+        if form.is_valid():
             try:
-                employee = get_object_or_404(User, pk=employee_id)
-                EmployeeResource.objects.create(
-                    employee=employee,
-                    project_budget=project_budget,
-                    allocation_ratio=allocation_ratio
+                report = save_allocation_grid(project_budget, form.changes, form.additions)
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                messages.success(
+                    request,
+                    f"Resources saved: {report['created']} added, {report['updated']} updated, "
+                    f"{report['deleted']} removed."
                 )
-                messages.success(request, "Resource added successfully.")
-            except IntegrityError:
-                messages.error(request, "This employee has already been assigned to this project budget.")
-            except Exception as e:
-                messages.error(request, f"An error occurred: {e}")
-
-        base_url = reverse('manage_resources', kwargs={'project_id': project.id})
-        query_string = urlencode({'period': selected_period})
-        url = f"{base_url}?{query_string}"
-        return HttpResponseRedirect(url)
-
-    employee_resources = EmployeeResource.objects.filter(project_budget=project_budget)
-    employees = User.objects.filter(is_active=True).exclude(employeeresource__project_budget=project_budget)
+                base_url = reverse('manage_resources', kwargs={'project_id': project.id})
+                query_string = urlencode({'period': selected_period})
+                url = f"{base_url}?{query_string}"
+                return HttpResponseRedirect(url)
+        messages.error(request, "Please correct the errors below.")
+    else:
+        form = AllocationGridForm(resources=resources)
 
+    # The employee picker searches employee_autocomplete instead of listing every user.
     return render(request, 'manage_resources.html', {
         'project': project,
         'project_budget': project_budget,
-        'employee_resources': employee_resources,
-        'employees': employees,
+        'form': form,
+        'period': month_input_value(budget_period),
+        'roles': User.ROLE_CHOICES,
     })
 
 @login_required
@@ -371,29 +556,19 @@ def edit_employee_resource(request, resource_id):
 
         if allocation_ratio and allocation_ratio in allowed_values:
             try:
-                if allocation_ratio != "intern":
-                    allocation_ratio = Decimal(allocation_ratio)
-
-                if allocation_ratio == "intern" or (Decimal('0') <= allocation_ratio <= Decimal('1')):
-                    same_month_allocations = EmployeeResource.objects.filter(
-                        employee=resource.employee,
-                        project_budget__month=resource.project_budget.month,
-                        project_budget__year=resource.project_budget.year
-                    ).exclude(pk=resource_id)
-
-                    total_allocation = same_month_allocations.aggregate(total=Sum('allocation_ratio'))['total'] or Decimal('0')
+                allocation_ratio, is_intern = parse_allocation_ratio(allocation_ratio)
 
-                    if allocation_ratio == "intern" or total_allocation + allocation_ratio <= Decimal('1'):
-                        resource.allocation_ratio = allocation_ratio
-                        resource.save()
+                if is_intern or (Decimal('0') <= allocation_ratio <= Decimal('1')):
+                    try:
+                        save_allocation(resource, allocation_ratio, is_intern)
                         messages.success(request, "Resource updated successfully.")
                         url = reverse('manage_resources', kwargs={'project_id': project_id})
                         return HttpResponseRedirect(f"{url}?period={period}")
-                    else:
-                        messages.error(request, f"Total allocation ratio cannot exceed 1 for {resource.employee.username} in {period}.")
+                    except ValidationError as e:
+                        messages.error(request, e.message)
                 else:
                     messages.error(request, "Allocation ratio must be between 0 and 1.")
-            except InvalidOperation:
+            except ValueError:
                 messages.error(request, "Invalid value for allocation ratio.")
         else:
             messages.error(request, "Invalid allocation ratio value.")
@@ -416,7 +591,7 @@ def delete_employee_resource(request, resource_id):
         return redirect('manager_dashboard')
 
     if request.method == 'POST':
-        resource.delete()
+        delete_allocation(resource)
         messages.success(request, "Resource deleted successfully.")
         url = reverse('manage_resources', kwargs={'project_id': project_id})
         return HttpResponseRedirect(f"{url}?period={period}")
@@ -428,18 +603,11 @@ def delete_employee_resource(request, resource_id):
 def check_allocation_conflict(request, employee_id):
     """Check if adding the specified allocation ratio would exceed 1 for the given employee or team lead."""
     try:
-        allocation_ratio = float(request.GET.get('allocation_ratio', 0))
-        month = request.GET.get('month')
-        year = request.GET.get('year')
-
-        same_month_allocations = EmployeeResource.objects.filter(
-            employee__id=employee_id,
-            project_budget__month=month,
-            project_budget__year=year
-        )
+        allocation_ratio, _ = parse_allocation_ratio(request.GET.get('allocation_ratio', 0))
+        budget_period = period_key(request.GET.get('month'), request.GET.get('year'))
+
+        total_allocation = EmployeeCapacity.allocated_for(employee_id, budget_period)
 
-        total_allocation = sum(resource.allocation_ratio for resource in same_month_allocations)
-        
         if total_allocation + allocation_ratio > 1:
             return JsonResponse({'conflict': True})
         else:
@@ -448,45 +616,93 @@ def check_allocation_conflict(request, employee_id):
     except ValueError:
         return JsonResponse({'conflict': True, 'error': 'Invalid data provided.'})
 
+MAX_CONFLICT_CHECKS = 500
+
 @login_required
-def resource_allocation_overview(request):
-    """View to display an overview of resource allocations for team leads and employees."""
+def check_allocation_conflicts(request):
+    """Check a batch of proposed allocations against the monthly cap in one query.
+
+    Takes a POSTed JSON list of ``{"employee", "period", "allocation_ratio"}``
+    objects, with periods in 'YYYY-MM' form and an optional ``budget`` whose
+    current allocation the proposal replaces. Answers with the items in the
+    same order, each with the employee's ``allocated`` total, the ``remaining``
+    capacity and a ``conflict`` flag.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST a JSON list of allocations.'}, status=405)
+
+    try:
+        items = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON.'}, status=400)
+    if not isinstance(items, list) or len(items) > MAX_CONFLICT_CHECKS:
+        return JsonResponse({'error': f'Send a list of at most {MAX_CONFLICT_CHECKS} allocations.'}, status=400)
+
+    proposals = []
+    for index, item in enumerate(items):
+        try:
+            allocation_ratio, _ = parse_allocation_ratio(item.get('allocation_ratio', 0))
+            if allocation_ratio < 0:
+                raise ValueError
+            budget_id = item.get('budget')
+            proposals.append((
+                int(item['employee']),
+                month_input_key(str(item['period'])),
+                allocation_ratio,
+                int(budget_id) if budget_id is not None else None,
+            ))
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return JsonResponse({
+                'error': f"Item {index}: give an employee id, a 'YYYY-MM' period and an allocation ratio."
+            }, status=400)
+
+    results = check_allocations(proposals) if proposals else []
+    return JsonResponse({'results': [
+        {
+            'employee': employee_id,
+            'period': month_input_value(period),
+            'allocation_ratio': allocation_ratio,
+            'budget': budget_id,
+            **result,
+        }
+        for (employee_id, period, allocation_ratio, budget_id), result in zip(proposals, results)
+    ]})
+
+def _filtered_allocations(request):
+    """Allocations matching the year, month and project filters of the overview pages."""
     year = request.GET.get('year', None)
     month = request.GET.get('month', None)
     project_id = request.GET.get('project', None)
 
-    allocations = EmployeeResource.objects.all().select_related('employee', 'project_budget')
+    allocations = EmployeeResource.objects.all()
 
     if year and month:
-        allocations = allocations.filter(
-            project_budget__month=month,
-            project_budget__year=year
-        )
-    
+        try:
+            allocations = allocations.filter(project_budget__period=period_key(month, year))
+        except ValueError:
+            allocations = allocations.none()
+
     if project_id:
         allocations = allocations.filter(project_budget__project__id=project_id)
 
-    resource_allocations = {}
-    for allocation in allocations:
-        employee = allocation.employee
-        if employee not in resource_allocations:
-            resource_allocations[employee] = {
-                'projects': [],
-                'allocated': Decimal('0.0')
-            }
+    return allocations
 
-        try:
-            allocation_ratio = Decimal(allocation.allocation_ratio)
-            resource_allocations[employee]['allocated'] += allocation_ratio
-        except InvalidOperation:
-            allocation_ratio = allocation.allocation_ratio
+def _csv_response(filename, header, rows):
+    response = StreamingHttpResponse(stream_csv(header, rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
-        resource_allocations[employee]['projects'].append({
-            'project': allocation.project_budget.project.name,
-            'allocation_ratio': allocation_ratio,
-            'month': allocation.project_budget.month,
-            'year': allocation.project_budget.year,
-        })
+@login_required
+def resource_allocation_overview(request):
+    """View to display an overview of resource allocations for team leads and employees."""
+    year = request.GET.get('year', None)
+    month = request.GET.get('month', None)
+    project_id = request.GET.get('project', None)
+
+    allocations = _filtered_allocations(request)
+
+    page, resource_allocations = allocation_overview(allocations, request.GET.get('page'))
+    filter_query = urlencode({key: value for key, value in request.GET.items() if key != 'page' and value})
 
     available_months = [month for month in list(calendar.month_abbr)[1:]]
     current_year = datetime.now().year
@@ -496,6 +712,8 @@ def resource_allocation_overview(request):
 
     return render(request, 'resource_allocation_overview.html', {
         'resource_allocations': resource_allocations,
+        'page': page,
+        'filter_query': filter_query,
         'available_months': available_months,
         'available_years': available_years,
         'available_projects': available_projects,
@@ -504,6 +722,15 @@ def resource_allocation_overview(request):
         'selected_project': project_id,
     })
 
+@login_required
+def resource_allocation_export(request):
+    """Stream the allocations of the resource overview as CSV."""
+    return _csv_response(
+        'resource_allocations.csv',
+        ALLOCATION_EXPORT_HEADER,
+        allocation_export_rows(_filtered_allocations(request))
+    )
+
 @login_required
 def add_employee_resource(request, project_id):
     """Handle adding a new resource to a project."""
@@ -511,7 +738,7 @@ def add_employee_resource(request, project_id):
 
     selected_period = request.GET.get('period')
     try:
-        month, year = selected_period.split()
+        budget_period = parse_period(selected_period)
     except (ValueError, AttributeError):
         messages.error(request, "Invalid or missing period information.")
         return redirect('project_details', project_id=project.id)
@@ -528,38 +755,123 @@ def add_employee_resource(request, project_id):
             messages.error(request, "Invalid allocation ratio. Please enter one of the allowed values.")
             return redirect('project_details', project_id=project.id)
 
-        allocation_ratio = allocation_ratio_input if allocation_ratio_input == "intern" else float(allocation_ratio_input)
+        allocation_ratio, is_intern = parse_allocation_ratio(allocation_ratio_input)
 
-        budget = ProjectBudget.objects.filter(project=project, month=month, year=year).first()
+        budget = ProjectBudget.objects.filter(project=project, period=budget_period).first()
         if budget:
-            if allocation_ratio != "intern":
-                current_allocations = EmployeeResource.objects.filter(
-                    employee=employee, 
-                    project_budget__month=month, 
-                    project_budget__year=year
-                ).aggregate(Sum('allocation_ratio'))['allocation_ratio__sum'] or 0
-
-                if current_allocations + allocation_ratio > 1.0:
-                    messages.error(request, "Allocation exceeds allowed limit for the employee in the selected period.")
-                    return redirect('project_details', project_id=project.id)
-
-            # Create the EmployeeResource
-            EmployeeResource.objects.create(
-                project_budget=budget,
-                employee=employee,
-                allocation_ratio=str(allocation_ratio) 
-            )
+            try:
+                save_allocation(EmployeeResource(project_budget=budget, employee=employee), allocation_ratio, is_intern)
+            except ValidationError:
+                messages.error(request, "Allocation exceeds allowed limit for the employee in the selected period.")
+                return redirect('project_details', project_id=project.id)
+            except IntegrityError:
+                messages.error(request, "This employee has already been assigned to this project budget.")
+                return redirect('project_details', project_id=project.id)
             messages.success(request, "Resource added successfully.")
         else:
             messages.error(request, "No budget found for the selected period.")
 
     return redirect('project_details', project_id=project.id)
 
+@login_required
+def allocation_import(request):
+    """Bulk import monthly allocations from an uploaded CSV file."""
+    report = None
+    if request.method == 'POST':
+        form = AllocationImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            csv_file = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            try:
+                report = import_allocations(read_allocation_csv(csv_file))
+            except ValidationError as e:
+                messages.error(request, e.messages[0])
+            except UnicodeDecodeError:
+                messages.error(request, "The file is not a UTF-8 encoded CSV.")
+            else:
+                messages.success(request, f"Imported {report['created']} allocations.")
+                if report['errors']:
+                    messages.error(request, f"{len(report['errors'])} rows were rejected.")
+    else:
+        form = AllocationImportForm()
+
+    return render(request, 'allocation_import.html', {'form': form, 'report': report})
+
+@login_required
+def roll_forward(request):
+    """Copy the allocations of a period into the next one, for one project or the whole portfolio."""
+    if request.method != 'POST':
+        return redirect('dashboard')
+
+    project = None
+    if request.POST.get('project_id'):
+        project = get_object_or_404(Project, pk=request.POST['project_id'])
+
+    try:
+        source_period = parse_period(request.POST.get('period', ''))
+    except ValueError:
+        messages.error(request, "Invalid period format.")
+        return redirect('project_details', project_id=project.id) if project else redirect('month_resource_allocation_overview')
+
+    report = roll_forward_allocations(source_period, project)
+    target = period_label(source_period + 1)
+    messages.success(
+        request,
+        f"Rolled {report['created']} allocations forward to {target}"
+        + (f", {report['existing']} were already assigned." if report['existing'] else ".")
+    )
+    for skipped in report['skipped']:
+        messages.warning(request, skipped)
+
+    if project:
+        url = reverse('project_details', kwargs={'project_id': project.id})
+        return HttpResponseRedirect(f"{url}?{urlencode({'period': target})}")
+    month, year = target.split()
+    url = reverse('month_resource_allocation_overview')
+    return HttpResponseRedirect(f"{url}?{urlencode({'month': month, 'year': year})}")
+
 @login_required
 def employee_overview(request):
-    """View to display all employees."""
-    employees = User.objects.filter(is_staff=False)  # Adjust as needed for your custom user fields
-    return render(request, 'employee_overview.html', {'employees': employees})
+    """View to display the employees a page at a time, filtered by name prefix and role."""
+    query = request.GET.get('q', '')
+    role = request.GET.get('role', '')
+    employees = User.search(User.objects.filter(is_staff=False), query, role)
+    page = Paginator(employees, 50).get_page(request.GET.get('page'))
+
+    params = request.GET.copy()
+    params.pop('page', None)
+    return render(request, 'employee_overview.html', {
+        'employees': page.object_list,
+        'page': page,
+        'query': query,
+        'selected_role': role,
+        'roles': User.ROLE_CHOICES,
+        'filter_query': params.urlencode(),
+    })
+
+AUTOCOMPLETE_LIMIT = 20
+
+@login_required
+def employee_autocomplete(request):
+    """Active employees whose name starts with ?q=, as JSON for the resource pickers.
+
+    ?role= narrows to one role and ?exclude_budget= leaves out the employees
+    already assigned to that budget.
+    """
+
+    employees = User.search(User.objects.filter(is_active=True), request.GET.get('q', ''), request.GET.get('role'))
+    try:
+        if request.GET.get('exclude_budget'):
+            employees = employees.filter(~Exists(EmployeeResource.objects.filter(
+                project_budget_id=int(request.GET['exclude_budget']),
+                employee=OuterRef('pk')
+            )))
+        limit = min(int(request.GET.get('limit', AUTOCOMPLETE_LIMIT)), 100)
+    except ValueError:
+        return JsonResponse({'error': 'exclude_budget and limit must be integers.'}, status=400)
+
+    return JsonResponse({
+        'results': list(employees.values('id', 'username', 'first_name', 'last_name', 'role')[:max(limit, 1)]),
+    })
 
 @login_required
 def add_employee(request):
@@ -613,7 +925,10 @@ def month_resource_allocation_overview(request):
 
     month_resource_summary = None
     if year and month:
-        project_budgets = ProjectBudget.objects.filter(month=month, year=year)
+        try:
+            project_budgets = ProjectBudget.objects.filter(period=period_key(month, year))
+        except ValueError:
+            project_budgets = ProjectBudget.objects.none()
 
         budgeted_resources_sum = project_budgets.aggregate(Sum('budgeted_resources'))['budgeted_resources__sum'] or Decimal('0.0')
 
@@ -637,6 +952,21 @@ def month_resource_allocation_overview(request):
         'month_resource_summary': month_resource_summary,
     })
 
+@login_required
+def month_resource_allocation_export(request):
+    """Stream the budgets of the selected month and year, or of every period, as CSV."""
+    year = request.GET.get('year', None)
+    month = request.GET.get('month', None)
+
+    project_budgets = ProjectBudget.objects.all()
+    if year and month:
+        try:
+            project_budgets = project_budgets.filter(period=period_key(month, year))
+        except ValueError:
+            project_budgets = project_budgets.none()
+
+    return _csv_response('budget_resources.csv', BUDGET_EXPORT_HEADER, budget_export_rows(project_budgets))
+
 @login_required
 def employee_management(request):
     return render(request, 'employee_management.html')
@@ -46,11 +46,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'app.middleware.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'app.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'app.middleware.PermissionMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -67,6 +69,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'app.context_processors.capabilities',
             ],
         },
     },
@@ -77,13 +80,112 @@ WSGI_APPLICATION = 'project_management.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+# DB_ENGINE=postgres switches to PostgreSQL (needs psycopg); anything else
+# uses SQLite at DB_NAME.
+
+if os.environ.get('DB_ENGINE') == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'project_management'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+    if os.environ.get('DB_POOL_MAX_SIZE'):
+        # psycopg's pool (pip install "psycopg[pool]") replaces persistent connections.
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.environ['DB_POOL_MAX_SIZE']),
+            },
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            # A file rather than the in-memory default, so the threaded tests
+            # in app/tests.py get real concurrent connections.
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+            'OPTIONS': {
+                # Writers take the lock when the transaction starts and wait
+                # up to DB_TIMEOUT seconds for it, instead of failing with
+                # "database is locked" when a read is upgraded to a write.
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': int(os.environ.get('DB_TIMEOUT', 20)),
+                # WAL lets readers run alongside the writer.
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA cache_size=-20000;'
+                ),
+            },
+        }
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Set CACHE_BACKEND=file to share cached fragments between worker processes.
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+if os.environ.get('CACHE_BACKEND') == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')),
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'project-management',
+        }
+    }
+
+
+# Sessions and the logged-in user
+# https://docs.djangoproject.com/en/5.1/topics/http/sessions/
+# SESSION_BACKEND=cached_db reads sessions from the cache and writes them
+# through to the database; signed_cookies keeps them in the browser's cookie
+# and never touches the database, but a session cannot be revoked before it
+# expires. app.middleware.CachedAuthenticationMiddleware keeps the logged-in
+# user in the cache for AUTH_USER_CACHE_TIMEOUT seconds (0 turns it off).
+# A user is dropped from the cache when saved, which only reaches other
+# worker processes through a shared cache, so the user cache is off unless
+# CACHE_BACKEND=file: with the local-memory cache a worker could keep serving
+# a deactivated or demoted user.
+
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[os.environ.get('SESSION_BACKEND', 'db')]
+
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 300)) if os.environ.get('CACHE_BACKEND') == 'file' else 0
+
+
+# Async views
+# Serve the async variants of the read-heavy views (app/async_views.py).
+# Off by default under both handlers: on SQLite the async views measured
+# slower than the sync ones (see benchmark_asgi). Turn it on for ASGI
+# deployments whose database gains from overlapping queries.
+
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '0') == '1'
+
+
+# Request metrics
+# Requests running more queries than this are logged as warnings by
+# app.middleware.RequestMetricsMiddleware.
+
+QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 50))
 
 
 # Password validation